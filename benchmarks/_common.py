@@ -0,0 +1,29 @@
+"""
+Shared setup for the benchmark scripts. Run them from the repository root,
+e.g. ``python benchmarks/bench_perform_draw.py``.
+"""
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, 'clubsandwich')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def use_headless_terminal(size=None):
+    from clubsandwich.blt.headless import HeadlessTerminal
+    from clubsandwich.blt.nice_terminal import set_backend
+    backend = HeadlessTerminal(size=size)
+    set_backend(backend)
+    return backend
+
+
+def best_time(fn, number, repeat=5):
+    """Returns the best time per call of ``fn``, in microseconds"""
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+
+def report(name, microseconds):
+    print('{:<32} {:>10.2f} us'.format(name, microseconds))
@@ -0,0 +1,54 @@
+"""
+Times laying out and drawing a screen full of ``LabelView``s against the
+headless terminal, plus ``LabelView.intrinsic_size`` on multi-line text.
+"""
+import os
+
+from _common import ROOT, best_time, report, use_headless_terminal
+
+from clubsandwich.blt.context import BearLibTerminalContext
+from clubsandwich.blt.cell_buffer import CellBuffer
+from clubsandwich.geom import Point, Rect, Size
+from clubsandwich.ui import LabelView, LayoutOptions, View
+
+SCREEN_SIZE = Size(80, 25)
+
+
+def make_screen():
+    # 8 columns of 10 cells by 25 rows, one short label per cell
+    labels = [
+        LabelView(
+            'Label {}'.format(i % 7),
+            layout_options=LayoutOptions(
+                width=10, height=1, left=(i % 8) * 10, top=i // 8,
+                right=None, bottom=None))
+        for i in range(8 * SCREEN_SIZE.height)]
+    return View(frame=Rect(Point(0, 0), SCREEN_SIZE), subviews=labels)
+
+
+def main():
+    use_headless_terminal(SCREEN_SIZE)
+    root = make_screen()
+    direct_ctx = BearLibTerminalContext()
+    buffer_ctx = BearLibTerminalContext(buffer=CellBuffer(SCREEN_SIZE))
+
+    def layout():
+        root.set_needs_layout(True)
+        root.perform_layout()
+
+    report('{} labels: layout'.format(len(root.subviews)), best_time(
+        layout, number=100))
+    report('{} labels: draw (direct)'.format(len(root.subviews)), best_time(
+        lambda: root.perform_draw(direct_ctx), number=100))
+    report('{} labels: draw (buffer)'.format(len(root.subviews)), best_time(
+        lambda: root.perform_draw(buffer_ctx), number=100))
+
+    path = os.path.join(ROOT, 'assets', 'text_images', 'robot.txt')
+    with open(path) as f:
+        robot = LabelView(f.read().rstrip())
+    report('intrinsic_size (robot.txt)', best_time(
+        lambda: robot.intrinsic_size, number=20000))
+
+
+if __name__ == '__main__':
+    main()
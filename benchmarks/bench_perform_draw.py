@@ -0,0 +1,46 @@
+"""
+Times ``View.perform_draw`` on a 1,000-view tree, and the ``geom`` operations
+it leans on, against the headless terminal.
+"""
+from _common import best_time, report, use_headless_terminal
+
+from clubsandwich.blt.context import BearLibTerminalContext
+from clubsandwich.blt.cell_buffer import CellBuffer
+from clubsandwich.geom import Point, Rect, Size
+from clubsandwich.ui import View
+
+
+def make_tree():
+    # 100 rows of 10 views each
+    root = View(frame=Rect(Point(0, 0), Size(80, 25)))
+    root.add_subviews([
+        View(
+            frame=Rect(Point(1, i % 20), Size(10, 1)),
+            subviews=[
+                View(frame=Rect(Point(j, 0), Size(1, 1))) for j in range(9)])
+        for i in range(100)])
+    return root
+
+
+def main():
+    use_headless_terminal()
+    root = make_tree()
+    direct_ctx = BearLibTerminalContext()
+    buffer_ctx = BearLibTerminalContext(buffer=CellBuffer(Size(80, 25)))
+    report('perform_draw (direct)', best_time(
+        lambda: root.perform_draw(direct_ctx), number=50))
+    report('perform_draw (buffer)', best_time(
+        lambda: root.perform_draw(buffer_ctx), number=50))
+
+    point = Point(3, 4)
+    rect = Rect(Point(1, 2), Size(10, 10))
+    other = Rect(Point(5, 5), Size(10, 10))
+    report('Point - Point', best_time(lambda: point - point, number=100000))
+    report('Rect.floored', best_time(lambda: rect.floored, number=100000))
+    report('Rect.intersects', best_time(
+        lambda: rect.intersects(other), number=100000))
+    report('Rect.moved_by', best_time(lambda: rect.moved_by(point), number=100000))
+
+
+if __name__ == '__main__':
+    main()
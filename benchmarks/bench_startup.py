@@ -0,0 +1,79 @@
+"""
+Times startup in fresh interpreters and checks it against a budget:
+importing ``clubsandwich.ui`` and ``game.assets``, and running ``run.py``'s
+main menu through its first frame on the headless terminal. Exits with
+status 1 if any median is over budget.
+
+    python benchmarks/bench_startup.py [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+from _common import ROOT
+
+# milliseconds; several times the typical time, so that only a regression
+# like an eager import of every UI module trips them. run.py imports the
+# event loop, and with it asyncio, which takes about 50 ms on its own.
+BUDGETS = {
+    'import clubsandwich.ui': 15,
+    'import game.assets': 60,
+    'run.py first frame': 300,
+}
+
+SNIPPETS = {
+    'import clubsandwich.ui': """
+import clubsandwich.ui
+""",
+    'import game.assets': """
+import game.assets
+""",
+    'run.py first frame': """
+from clubsandwich.blt.headless import HeadlessTerminal
+from clubsandwich.blt.nice_terminal import set_backend
+set_backend(HeadlessTerminal())
+import run
+loop = run.TestLoop(compositor=True, snapshot_state=True)
+loop.terminal_init()
+loop.run_loop_iteration()
+""",
+}
+
+TEMPLATE = """
+import contextlib, io, time
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    exec(compile({code!r}, '<startup>', 'exec'))
+print(time.perf_counter() - start)
+"""
+
+
+def time_snippet(code):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [ROOT, os.path.join(ROOT, 'clubsandwich')] +
+        [p for p in [env.get('PYTHONPATH')] if p])
+    result = subprocess.run(
+        [sys.executable, '-c', TEMPLATE.format(code=code)],
+        cwd=ROOT, env=env, check=True, stdout=subprocess.PIPE,
+        universal_newlines=True)
+    return float(result.stdout.split()[-1]) * 1000
+
+
+def main(runs=15):
+    over_budget = False
+    for name, code in SNIPPETS.items():
+        # the first run may also fill caches, e.g. the figlet cache
+        time_snippet(code)
+        median = statistics.median(time_snippet(code) for _ in range(runs))
+        budget = BUDGETS[name]
+        status = 'ok' if median <= budget else 'OVER BUDGET'
+        over_budget = over_budget or median > budget
+        print('{:<24} {:>8.1f} ms  (budget {} ms) {}'.format(
+            name, median, budget, status))
+    return 1 if over_budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*[int(arg) for arg in sys.argv[1:]]))
@@ -0,0 +1,57 @@
+"""
+Glyph sets and cached strings for drawing boxes with a handful of ``print()``
+calls instead of one ``put()`` per border cell. See
+``BearLibTerminalContext.draw_box()``.
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+
+BoxGlyphs = namedtuple(
+  'BoxGlyphs',
+  ['top_left', 'top_right', 'bottom_left', 'bottom_right', 'horizontal', 'vertical'])
+
+
+BOX_STYLES = {
+  'single': BoxGlyphs('┌', '┐', '└', '┘', '─', '│'),
+  'double': BoxGlyphs('╔', '╗', '╚', '╝', '═', '║'),
+  'heavy': BoxGlyphs('┏', '┓', '┗', '┛', '━', '┃'),
+  'rounded': BoxGlyphs('╭', '╮', '╰', '╯', '─', '│'),
+  'ascii': BoxGlyphs('+', '+', '+', '+', '-', '|'),
+}
+
+
+def _get_glyphs(style):
+  if isinstance(style, BoxGlyphs):
+    return style
+  return BOX_STYLES[style]
+
+
+@lru_cache(maxsize=256)
+def get_box_edges(width, height, style='single'):
+  """
+  Returns ``(top, bottom, side)`` strings for a box of the given size: the top
+  and bottom rows including corners, and a newline-separated vertical edge
+  without corners. Requires ``width >= 2`` and ``height >= 2``.
+  """
+  g = _get_glyphs(style)
+  top = g.top_left + g.horizontal * (width - 2) + g.top_right
+  bottom = g.bottom_left + g.horizontal * (width - 2) + g.bottom_right
+  side = '\n'.join([g.vertical] * (height - 2))
+  return top, bottom, side
+
+
+@lru_cache(maxsize=256)
+def get_box_string(width, height, style='single'):
+  """
+  Returns a newline-separated string that draws a whole box of the given size,
+  with spaces inside, in a single ``print()``.
+  """
+  g = _get_glyphs(style)
+  if height == 1:
+    return g.horizontal * width
+  if width == 1:
+    return '\n'.join([g.vertical] * height)
+  top, bottom, _ = get_box_edges(width, height, style)
+  middle = g.vertical + ' ' * (width - 2) + g.vertical
+  return '\n'.join([top] + [middle] * (height - 2) + [bottom])
@@ -0,0 +1,301 @@
+"""
+An off-screen grid of cells that can stand in for the terminal while drawing.
+At the end of a frame, ``CellBuffer.flush()`` sends only the cells that differ
+from the previous flush, in as few ``print()`` calls as possible.
+"""
+import re
+from array import array
+from functools import lru_cache
+
+from clubsandwich.geom import Size
+from .nice_terminal import terminal
+
+
+DEFAULT_FG = 0xFFFFFFFF
+DEFAULT_BG = 0xFF000000
+BLANK = ord(' ')
+
+
+@lru_cache(maxsize=256)
+def parse_color(value):
+  """
+  Convert a BearLibTerminal color value (``'#rrggbb'``, ``'#aarrggbb'``, a
+  color name, or an integer) to a ``0xAARRGGBB`` integer
+  """
+  if isinstance(value, int):
+    return value & 0xFFFFFFFF
+  if value.startswith('#'):
+    if len(value) == 7:
+      return 0xFF000000 | int(value[1:], 16)
+    elif len(value) == 9:
+      return int(value[1:], 16)
+  return terminal.color_from_name(value) & 0xFFFFFFFF
+
+
+def _escape(text):
+  return text.replace('[', '[[').replace(']', ']]')
+
+
+### fonts ###
+
+# font id -> BearLibTerminal font name; 0 is the base font
+_FONT_NAMES = ['']
+_FONT_IDS = {'': 0, 'default': 0}
+
+
+def get_font_id(name):
+  """Returns a small integer standing for the font called ``name``"""
+  font_id = _FONT_IDS.get(name)
+  if font_id is None:
+    font_id = _FONT_IDS[name] = len(_FONT_NAMES)
+    _FONT_NAMES.append(name)
+  return font_id
+
+
+### markup ###
+
+_MARKUP_RE = re.compile(r'\[\[|\]\]|\[[^\[\]]*\]')
+
+
+def has_markup(text):
+  return '[' in text or ']' in text
+
+
+def parse_markup(text, fg=DEFAULT_FG, bg=DEFAULT_BG):
+  """
+  Parse the BearLibTerminal markup that ``CellBuffer`` supports into a list
+  of lines, each a list of ``(code, fg, bg, font_id)`` cells.
+
+  ``[color=...]``/``[c=...]``, ``[bkcolor=...]``/``[b=...]``, and
+  ``[font=...]`` apply until their closing tag (e.g. ``[/color]``) and may be
+  nested. ``[[`` and ``]]`` are literal brackets. Other tags are dropped.
+  """
+  fgs = [fg]
+  bgs = [bg]
+  fonts = [0]
+  lines = [[]]
+  position = 0
+  for match in _MARKUP_RE.finditer(text):
+    _add_markup_text(lines, text[position:match.start()], fgs, bgs, fonts)
+    position = match.end()
+    token = match.group(0)
+    if token == '[[' or token == ']]':
+      _add_markup_text(lines, token[0], fgs, bgs, fonts)
+      continue
+    name, _, value = token[1:-1].partition('=')
+    name = name.strip().lower()
+    stack = {
+      'color': fgs, 'c': fgs, 'bkcolor': bgs, 'b': bgs, 'font': fonts,
+    }.get(name.lstrip('/'))
+    if stack is None:
+      continue
+    elif name.startswith('/'):
+      if len(stack) > 1:
+        stack.pop()
+    elif stack is fonts:
+      stack.append(get_font_id(value.strip()))
+    else:
+      stack.append(parse_color(value.strip()))
+  _add_markup_text(lines, text[position:], fgs, bgs, fonts)
+  return lines
+
+
+def _add_markup_text(lines, text, fgs, bgs, fonts):
+  cell_style = (fgs[-1], bgs[-1], fonts[-1])
+  for i, line in enumerate(text.split('\n')):
+    if i:
+      lines.append([])
+    lines[-1].extend((ord(char),) + cell_style for char in line)
+
+
+class CellBuffer:
+  """
+  Stores a codepoint, foreground color, background color, and font id (see
+  ``get_font_id()``) for each cell, in flat ``array`` objects indexed by
+  ``y * width + x``.
+
+  ``print()`` stores text as-is. ``print_markup()`` interprets the markup
+  supported by ``parse_markup()``.
+  """
+
+  def __init__(self, size=None):
+    self.size = None
+    self.resize(size or Size(0, 0))
+
+  def resize(self, size):
+    """Resize and blank the buffer. No-op if the size is unchanged."""
+    if size == self.size:
+      return
+    self.size = size
+    n = size.width * size.height
+    self.codes = array('I', [BLANK]) * n
+    self.fgs = array('I', [DEFAULT_FG]) * n
+    self.bgs = array('I', [DEFAULT_BG]) * n
+    self.fonts = array('I', [0]) * n
+    self.invalidate()
+
+  def invalidate(self):
+    """Forget what was last flushed so the next flush sends every cell"""
+    self._flushed = None
+
+  def _index(self, x, y):
+    if 0 <= x < self.size.width and 0 <= y < self.size.height:
+      return y * self.size.width + x
+    return None
+
+  def clear(self, bg=DEFAULT_BG):
+    self.clear_area(0, 0, self.size.width, self.size.height, bg)
+
+  def clear_area(self, x, y, width, height, bg=DEFAULT_BG):
+    x1 = max(0, x)
+    x2 = min(self.size.width, x + width)
+    if x1 >= x2:
+      return
+    n = x2 - x1
+    blanks = array('I', [BLANK]) * n
+    fgs = array('I', [DEFAULT_FG]) * n
+    bgs = array('I', [bg]) * n
+    fonts = array('I', [0]) * n
+    for row in range(max(0, y), min(self.size.height, y + height)):
+      i = row * self.size.width + x1
+      self.codes[i:i + n] = blanks
+      self.fgs[i:i + n] = fgs
+      self.bgs[i:i + n] = bgs
+      self.fonts[i:i + n] = fonts
+
+  def copy(self):
+    """Returns a new buffer with the same cells. Flush state isn't copied."""
+    other = CellBuffer(self.size)
+    other.codes = array('I', self.codes)
+    other.fgs = array('I', self.fgs)
+    other.bgs = array('I', self.bgs)
+    other.fonts = array('I', self.fonts)
+    return other
+
+  def copy_area_from(self, other, x, y, width, height):
+    """Copy an area of cells from ``other``, which must be the same size"""
+    x1 = max(0, x)
+    x2 = min(self.size.width, x + width)
+    if x1 >= x2:
+      return
+    for row in range(max(0, y), min(self.size.height, y + height)):
+      i = row * self.size.width + x1
+      j = i + x2 - x1
+      self.codes[i:j] = other.codes[i:j]
+      self.fgs[i:j] = other.fgs[i:j]
+      self.bgs[i:j] = other.bgs[i:j]
+      self.fonts[i:j] = other.fonts[i:j]
+
+  def put(self, x, y, code, fg=DEFAULT_FG, bg=DEFAULT_BG, font_id=0):
+    i = self._index(x, y)
+    if i is None:
+      return
+    self.codes[i] = ord(code) if isinstance(code, str) else code
+    self.fgs[i] = fg
+    self.bgs[i] = bg
+    self.fonts[i] = font_id
+
+  def print(self, x, y, text, fg=DEFAULT_FG, bg=DEFAULT_BG):
+    for line in text.split('\n'):
+      if 0 <= y < self.size.height:
+        start = max(0, -x)
+        end = min(len(line), self.size.width - x)
+        if start < end:
+          n = end - start
+          i = y * self.size.width + x + start
+          self.codes[i:i + n] = array('I', map(ord, line[start:end]))
+          self.fgs[i:i + n] = array('I', [fg]) * n
+          self.bgs[i:i + n] = array('I', [bg]) * n
+          self.fonts[i:i + n] = array('I', [0]) * n
+      y += 1
+
+  def print_markup(self, x, y, text, fg=DEFAULT_FG, bg=DEFAULT_BG, clip_rect=None):
+    """
+    Like ``print()``, but interprets markup with ``parse_markup()``. If
+    ``clip_rect`` is given, cells outside it are left alone.
+    """
+    for row, cells in enumerate(parse_markup(text, fg, bg), y):
+      if clip_rect is not None and not clip_rect.y <= row <= clip_rect.y2:
+        continue
+      for column, (code, cell_fg, cell_bg, font_id) in enumerate(cells, x):
+        if clip_rect is None or clip_rect.x <= column <= clip_rect.x2:
+          self.put(column, row, code, cell_fg, cell_bg, font_id)
+
+  def pick(self, x, y):
+    i = self._index(x, y)
+    return 0 if i is None else self.codes[i]
+
+  def pick_color(self, x, y):
+    i = self._index(x, y)
+    return 0 if i is None else self.fgs[i]
+
+  def pick_bkcolor(self, x, y):
+    i = self._index(x, y)
+    return 0 if i is None else self.bgs[i]
+
+  def flush(self, terminal):
+    """
+    Send every cell that changed since the last flush to ``terminal``. Runs of
+    changed cells with the same colors and font are sent as a single
+    ``print()``.
+    Only the terminal's current layer is touched.
+
+    Returns the number of cells sent.
+    """
+    codes, fgs, bgs, fonts = self.codes, self.fgs, self.bgs, self.fonts
+    width = self.size.width
+    old = self._flushed
+    if old is None:
+      terminal.clear_area(0, 0, width, self.size.height)
+    elif (old[0] == codes and old[1] == fgs and old[2] == bgs and
+          old[3] == fonts):
+      return 0
+
+    num_sent = 0
+    last_fg = None
+    last_bg = None
+    for y in range(self.size.height):
+      row_start = y * width
+      row_end = row_start + width
+      if old is not None and (
+          old[0][row_start:row_end] == codes[row_start:row_end] and
+          old[1][row_start:row_end] == fgs[row_start:row_end] and
+          old[2][row_start:row_end] == bgs[row_start:row_end] and
+          old[3][row_start:row_end] == fonts[row_start:row_end]):
+        continue
+
+      i = row_start
+      while i < row_end:
+        if old is not None and (
+            old[0][i] == codes[i] and old[1][i] == fgs[i] and
+            old[2][i] == bgs[i] and old[3][i] == fonts[i]):
+          i += 1
+          continue
+        fg = fgs[i]
+        bg = bgs[i]
+        font_id = fonts[i]
+        run_start = i
+        i += 1
+        while i < row_end and (
+            fgs[i] == fg and bgs[i] == bg and fonts[i] == font_id):
+          if old is not None and (
+              old[0][i] == codes[i] and old[1][i] == fg and
+              old[2][i] == bg and old[3][i] == font_id):
+            break
+          i += 1
+
+        if fg != last_fg:
+          terminal.color(fg)
+          last_fg = fg
+        if bg != last_bg:
+          terminal.bkcolor(bg)
+          last_bg = bg
+        text = _escape(''.join(map(chr, codes[run_start:i])))
+        if font_id:
+          text = '[font={}]{}[/font]'.format(_FONT_NAMES[font_id], text)
+        terminal.print(run_start - row_start, y, text)
+        num_sent += i - run_start
+
+    self._flushed = (
+      array('I', codes), array('I', fgs), array('I', bgs), array('I', fonts))
+    return num_sent
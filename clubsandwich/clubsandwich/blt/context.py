@@ -1,16 +1,58 @@
 from contextlib import contextmanager
-from .nice_terminal import NiceTerminal
+from .box_drawing import get_box_edges, get_box_string
+from .cell_buffer import (
+  DEFAULT_BG, DEFAULT_FG, CellBuffer, has_markup, parse_color)
+from .nice_terminal import NiceTerminal, terminal
 from clubsandwich.geom import Point
 
 class BearLibTerminalContext(NiceTerminal):
   """
   Like ``NiceTerminal``, but you can use ``translate()`` to offset all
-  calls that take a position or rect.
+  calls that take a position or rect, and ``clip()`` to ignore drawing outside
+  a rect.
+
+  If ``buffer`` is a ``CellBuffer``, drawing goes to the buffer instead of the
+  terminal ("compositor mode"), and nothing appears until you call
+  ``flush()``. In compositor mode, ``print()`` understands the markup
+  described in ``cell_buffer.parse_markup()`` (colors, fonts, and escaped
+  brackets) and drops any other tags.
+
+  In direct mode, clipping of ``print()`` assumes plain text, and lines
+  containing BearLibTerminal markup are only clipped vertically.
+
+  Colors are tracked by the context as parsed integers, starting at
+  ``DEFAULT_FG``/``DEFAULT_BG``. Use ``temporary_color()`` (or
+  ``push_color()``/``pop_color()``) instead of reading and restoring
+  ``blt_state.color``; when the stack pops back to empty, the default colors
+  are restored. Changes are only sent to the terminal right before something
+  is drawn or cleared, and only if they differ from what the terminal already
+  has. If other code changes the terminal's colors directly, call
+  ``invalidate_color_state()``.
+
+  ``layer()`` selects a BearLibTerminal layer, and ``clear_area()`` only
+  clears the current layer. In compositor mode, each layer gets its own
+  ``CellBuffer`` and ``self.buffer`` is the current layer's. Within
+  ``isolate_layer()``, drawing on any other layer is ignored.
   """
 
-  def __init__(self, *args, **kwargs):
+  def __init__(self, *args, buffer=None, **kwargs):
     super().__init__(*args, **kwargs)
     self.offset = Point(0, 0)
+    self.clip_rect = None  # in absolute terminal coordinates
+    self.buffer = buffer
+    self.current_layer = 0
+    self._isolated_layer = None
+    # True while drawing on a layer other than the isolated one
+    self._is_layer_ignored = False
+    # compositor mode: layer -> CellBuffer
+    self._layer_buffers = None if buffer is None else {0: buffer}
+    self._color_stack = []
+    # colors that drawing should use
+    self._color = DEFAULT_FG
+    self._bkcolor = DEFAULT_BG
+    # colors the terminal is known to have; None means unknown
+    self._terminal_color = None
+    self._terminal_bkcolor = None
 
   @contextmanager
   def translate(self, offset_delta):
@@ -19,33 +61,287 @@ class BearLibTerminalContext(NiceTerminal):
     yield
     self.offset = old_offset
 
+  @contextmanager
+  def clip(self, rect):
+    """
+    Ignore all drawing outside ``rect``, which is relative to the current
+    offset. Nested clips intersect.
+    """
+    old_clip_rect = self.clip_rect
+    rect = rect.moved_by(self.offset)
+    if old_clip_rect is None:
+      self.clip_rect = rect
+    else:
+      self.clip_rect = old_clip_rect.intersection(rect)
+    yield
+    self.clip_rect = old_clip_rect
+
+  ### layers ###
+
+  def layer(self, index):
+    self.current_layer = index
+    if self._layer_buffers is None:
+      return super().__getattr__('layer')(index)
+    self.buffer = self._layer_buffers.get(index)
+    if self.buffer is None:
+      self.buffer = CellBuffer(self._layer_buffers[0].size)
+      self._layer_buffers[index] = self.buffer
+
+  @contextmanager
+  def temporary_layer(self, index):
+    old_layer = self.current_layer
+    old_is_layer_ignored = self._is_layer_ignored
+    self.layer(index)
+    self._is_layer_ignored = (
+      self._isolated_layer is not None and index != self._isolated_layer)
+    yield
+    self._is_layer_ignored = old_is_layer_ignored
+    self.layer(old_layer)
+
+  @contextmanager
+  def isolate_layer(self, index):
+    """
+    Select layer ``index`` and ignore drawing done inside
+    ``temporary_layer()`` blocks for other layers
+    """
+    old_isolated_layer = self._isolated_layer
+    self._isolated_layer = index
+    with self.temporary_layer(index):
+      yield
+    self._isolated_layer = old_isolated_layer
+
+  ### colors ###
+
+  @property
+  def current_color(self):
+    return self._color
+
+  @property
+  def current_bkcolor(self):
+    return self._bkcolor
+
+  def color(self, value):
+    self._color = parse_color(value)
+
+  def bkcolor(self, value):
+    self._bkcolor = parse_color(value)
+
+  def push_color(self, fg=None, bg=None):
+    """Save the current colors, then change whichever of ``fg``/``bg`` are given"""
+    self._color_stack.append((self.current_color, self.current_bkcolor))
+    if fg:
+      self._color = parse_color(fg)
+    if bg:
+      self._bkcolor = parse_color(bg)
+
+  def pop_color(self):
+    self._color, self._bkcolor = self._color_stack.pop()
+    if not self._color_stack:
+      self._color = DEFAULT_FG
+      self._bkcolor = DEFAULT_BG
+
+  def reset_colors(self):
+    """
+    Drop any pushed colors and go back to the defaults. In direct mode, the
+    terminal is set to the defaults right away, so that anything drawn or
+    cleared without this context doesn't pick up a leftover color.
+    """
+    self._color_stack = []
+    self._color = DEFAULT_FG
+    self._bkcolor = DEFAULT_BG
+    if self.buffer is None:
+      self._sync_colors()
+
+  @contextmanager
+  def temporary_color(self, fg=None, bg=None):
+    self.push_color(fg, bg)
+    yield
+    self.pop_color()
+
+  def invalidate_color_state(self):
+    """
+    Forget what colors the terminal has, because something other than this
+    context may have changed them. Has no effect in compositor mode.
+    """
+    if self.buffer is None:
+      self._terminal_color = None
+      self._terminal_bkcolor = None
+
+  def _sync_colors(self):
+    if self._color != self._terminal_color:
+      super().__getattr__('color')(self._color)
+      self._terminal_color = self._color
+    if self._bkcolor != self._terminal_bkcolor:
+      super().__getattr__('bkcolor')(self._bkcolor)
+      self._terminal_bkcolor = self._bkcolor
+
+  ### compositor mode ###
+
+  def resize_buffers(self, size):
+    """In compositor mode, resize (and blank) every layer's buffer"""
+    if self._layer_buffers is not None:
+      for buffer in self._layer_buffers.values():
+        buffer.resize(size)
+
+  def invalidate_buffers(self):
+    """In compositor mode, make the next ``flush()`` send every cell"""
+    if self._layer_buffers is not None:
+      for buffer in self._layer_buffers.values():
+        buffer.invalidate()
+
+  def flush(self):
+    """
+    In compositor mode, send changed cells to the terminal and return how many
+    were sent. Otherwise, do nothing and return ``None``.
+    """
+    if self._layer_buffers is None:
+      return None
+    num_sent = 0
+    for index in sorted(self._layer_buffers):
+      terminal.layer(index)
+      num_sent += self._layer_buffers[index].flush(terminal)
+    terminal.layer(self.current_layer)
+    return num_sent
+
+  def _buffer_print(self, point, args):
+    text = args[0] % args[1:] if len(args) > 1 else args[0]
+    if not has_markup(text):
+      return self._print_clipped(self._buffer_print_plain, point, (text,))
+    if self._is_layer_ignored:
+      return
+    point = point + self.offset
+    self.buffer.print_markup(
+      point.x, point.y, text, self._color, self._bkcolor, self.clip_rect)
+
+  def _buffer_print_plain(self, point, text):
+    self.buffer.print(point.x, point.y, text, self._color, self._bkcolor)
+
+  ### drawing ###
+
+  def _is_point_clipped(self, point):
+    return self._is_layer_ignored or (
+      self.clip_rect is not None and not self.clip_rect.contains(point))
+
+  def _print_clipped(self, method, point, args):
+    if self._is_layer_ignored:
+      return
+    point = point + self.offset
+    if self.clip_rect is None:
+      return method(point, *args)
+    if len(args) != 1 or not isinstance(args[0], str):
+      if self.clip_rect.contains(point):
+        return method(point, *args)
+      return
+    clip = self.clip_rect
+    for i, line in enumerate(args[0].split('\n')):
+      y = point.y + i
+      if y < clip.y or y > clip.y2:
+        continue
+      if '[' in line:
+        method(Point(point.x, y), line)
+        continue
+      start = max(0, clip.x - point.x)
+      end = min(len(line), clip.x2 + 1 - point.x)
+      if start < end:
+        method(Point(point.x + start, y), line[start:end])
+
+  def clear(self):
+    """Clear every layer"""
+    if self.buffer is None:
+      self._sync_colors()
+      return super().__getattr__('clear')()
+    for buffer in self._layer_buffers.values():
+      buffer.clear(self._bkcolor)
+
   def clear_area(self, rect, *args):
-    return super().clear_area(rect.moved_by(self.offset), *args)
+    if self._is_layer_ignored:
+      return
+    rect = rect.moved_by(self.offset)
+    if self.clip_rect is not None:
+      rect = rect.intersection(self.clip_rect)
+      if rect.is_empty:
+        return
+    if self.buffer is not None:
+      return self.buffer.clear_area(
+        rect.origin.x, rect.origin.y, rect.size.width, rect.size.height,
+        self._bkcolor)
+    self._sync_colors()
+    return super().clear_area(rect, *args)
+
+  def draw_box(self, rect, style='single', fill=True):
+    """
+    Draw a border along the inside edge of ``rect`` using a style name from
+    ``box_drawing.BOX_STYLES`` or a ``BoxGlyphs``. If ``fill`` is true, the
+    inside is cleared to the current background color by the same single
+    ``print()``; otherwise only the border is drawn, in at most four calls.
+    """
+    width, height = rect.size
+    if width <= 0 or height <= 0:
+      return
+    if fill or width < 2 or height < 2:
+      self.print(rect.origin, get_box_string(width, height, style))
+      return
+    top, bottom, side = get_box_edges(width, height, style)
+    self.print(rect.origin, top)
+    self.print(Point(rect.x, rect.y2), bottom)
+    if side:
+      self.print(Point(rect.x, rect.y + 1), side)
+      self.print(Point(rect.x2, rect.y + 1), side)
 
   def crop(self, rect, *args):
     return super().crop(rect.moved_by(self.offset), *args)
 
   def print(self, point, *args):
-    return super().print(point + self.offset, *args)
+    if self.buffer is not None:
+      return self._buffer_print(point, args)
+    self._sync_colors()
+    return self._print_clipped(super().print, point, args)
 
   def printf(self, point, *args):
-    return super().printf(point + self.offset, *args)
+    if self.buffer is not None:
+      return self._buffer_print(point, args)
+    self._sync_colors()
+    return self._print_clipped(super().printf, point, args)
 
   def put(self, point, *args):
-    return super().put(point + self.offset, *args)
+    point = point + self.offset
+    if self._is_point_clipped(point):
+      return
+    if self.buffer is not None:
+      return self.buffer.put(
+        point.x, point.y, args[0], self._color, self._bkcolor)
+    self._sync_colors()
+    return super().put(point, *args)
 
   def pick(self, point, *args):
+    if self.buffer is not None:
+      point = point + self.offset
+      return self.buffer.pick(point.x, point.y)
     return super().pick(point + self.offset, *args)
 
   def pick_color(self, point, *args):
+    if self.buffer is not None:
+      point = point + self.offset
+      return self.buffer.pick_color(point.x, point.y)
     return super().pick_color(point + self.offset, *args)
 
   def pick_bkcolor(self, point, *args):
+    if self.buffer is not None:
+      point = point + self.offset
+      return self.buffer.pick_bkcolor(point.x, point.y)
     return super().pick_bkcolor(point + self.offset, *args)
 
   def put_ext(self, point, *args):
-    return super().put_ext(point + self.offset, *args)
+    """In compositor mode, the pixel offset and corner colors are ignored."""
+    point = point + self.offset
+    if self._is_point_clipped(point):
+      return
+    if self.buffer is not None:
+      return self.buffer.put(
+        point.x, point.y, args[1], self._color, self._bkcolor)
+    self._sync_colors()
+    return super().put_ext(point, *args)
 
   def read_str(self, point, *args):
     return super().read_str(point + self.offset, *args)
-  
\ No newline at end of file
+
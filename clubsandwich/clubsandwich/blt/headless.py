@@ -0,0 +1,307 @@
+"""
+An in-memory terminal backend, for running and profiling clubsandwich code
+without opening a window::
+
+    from clubsandwich.blt.headless import HeadlessTerminal
+    from clubsandwich.blt.nice_terminal import set_backend
+
+    backend = HeadlessTerminal()
+    set_backend(backend)
+    backend.push_input(backend.TK_TAB, backend.TK_ENTER)
+
+    loop = MyDirectorLoop()
+    loop.terminal_init()
+    while loop.run_loop_iteration():
+      pass
+    print(backend.get_text())
+
+Input is scripted with ``push_input()``. Reading from an empty queue returns
+``TK_CLOSE``, and so does peeking at one, which is how an idle loop waits for
+input, so a loop ends once its script runs out.
+"""
+import re
+from collections import deque
+
+from bearlibterminal import terminal as _blt_terminal
+
+from clubsandwich.geom import Size
+from .cell_buffer import DEFAULT_BG, DEFAULT_FG, parse_color
+
+
+_WINDOW_SIZE_RE = re.compile(r'window\.size\s*=\s*(\d+)x(\d+)')
+_CELL_SIZE_RE = re.compile(r'window\.cellsize\s*=\s*(\d+)x(\d+)')
+_MARKUP_RE = re.compile(r'\[\[|\]\]|\[[^\]]*\]')
+
+_COLOR_NAMES = {
+  'black': 0xFF000000,
+  'white': 0xFFFFFFFF,
+  'gray': 0xFF808080,
+  'grey': 0xFF808080,
+  'red': 0xFFFF0000,
+  'green': 0xFF00FF00,
+  'blue': 0xFF0000FF,
+  'yellow': 0xFFFFFF00,
+  'cyan': 0xFF00FFFF,
+  'magenta': 0xFFFF00FF,
+  'transparent': 0x00000000,
+}
+
+
+def _strip_markup(text):
+  def replace(match):
+    token = match.group(0)
+    if token == '[[':
+      return '['
+    elif token == ']]':
+      return ']'
+    return ''
+  return _MARKUP_RE.sub(replace, text)
+
+
+class HeadlessTerminal:
+  """
+  Implements the parts of ``bearlibterminal.terminal`` that clubsandwich uses,
+  against an in-memory grid of cells. ``TK_*`` constants are the real
+  BearLibTerminal values.
+
+  ``state()`` tracks window size, colors, layer, the last event, mouse
+  position, and which keys are held down (from key press/release events read
+  from the queue).
+  """
+
+  def __init__(self, size=None, cell_size=None):
+    self.size = size or Size(80, 25)
+    self.cell_size = cell_size or Size(16, 24)
+    self.is_open = False
+    self.config = []
+    self.input_queue = deque()
+    self.num_refreshes = 0
+    self.num_draw_calls = 0
+
+    # layer -> {(x, y): (code, fg, bg)}
+    self.layers = {0: {}}
+    self.current_layer = 0
+    self.current_color = DEFAULT_FG
+    self.current_bkcolor = DEFAULT_BG
+    self.composition_mode = 0
+
+    self.last_event = 0
+    self.last_char = 0
+    self.mouse_x = 0
+    self.mouse_y = 0
+    self.mouse_wheel = 0
+    self.keys_down = set()
+
+  def __getattr__(self, k):
+    if k.startswith('TK_'):
+      return getattr(_blt_terminal, k)
+    raise AttributeError(k)
+
+  ### scripting ###
+
+  def push_input(self, *events):
+    """
+    Queue raw events, e.g. ``TK_SHIFT, TK_TAB, TK_SHIFT | TK_KEY_RELEASED``.
+    """
+    for event in events:
+      self.input_queue.append((event, None))
+
+  def push_char(self, event, char):
+    """Queue a key event that also sets ``TK_CHAR``/``TK_WCHAR``"""
+    self.input_queue.append((event, {'last_char': ord(char)}))
+
+  def push_mouse(self, event, x, y, wheel=0):
+    """Queue a mouse event that happens at cell ``(x, y)``"""
+    self.input_queue.append(
+      (event, {'mouse_x': x, 'mouse_y': y, 'mouse_wheel': wheel}))
+
+  def resize(self, size):
+    """Change the window size and queue a ``TK_RESIZED`` event"""
+    self.size = size
+    self.input_queue.append((self.TK_RESIZED, None))
+
+  ### inspection ###
+
+  def get_cell(self, x, y, layer=0):
+    """Returns ``(code, fg, bg)``, or ``None`` if the cell is empty"""
+    return self.layers.get(layer, {}).get((x, y))
+
+  def get_text(self, layer=0):
+    """Returns the characters on ``layer`` as one string per row, joined by newlines"""
+    cells = self.layers.get(layer, {})
+    lines = []
+    for y in range(self.size.height):
+      lines.append(''.join(
+        chr(cells[(x, y)][0]) if (x, y) in cells else ' '
+        for x in range(self.size.width)).rstrip())
+    return '\n'.join(lines)
+
+  ### lifecycle ###
+
+  def open(self):
+    self.is_open = True
+    return True
+
+  def close(self):
+    self.is_open = False
+
+  def set(self, config):
+    self.config.append(config)
+    m = _WINDOW_SIZE_RE.search(config)
+    if m:
+      self.size = Size(int(m.group(1)), int(m.group(2)))
+    m = _CELL_SIZE_RE.search(config)
+    if m:
+      self.cell_size = Size(int(m.group(1)), int(m.group(2)))
+    return True
+
+  def refresh(self):
+    self.num_refreshes += 1
+
+  def delay(self, period):
+    pass
+
+  ### drawing ###
+
+  def clear(self):
+    self.num_draw_calls += 1
+    self.layers = {0: {}}
+    if self.current_bkcolor != DEFAULT_BG:
+      for y in range(self.size.height):
+        for x in range(self.size.width):
+          self.layers[0][(x, y)] = (ord(' '), self.current_color, self.current_bkcolor)
+
+  def clear_area(self, x, y, width, height):
+    self.num_draw_calls += 1
+    cells = self.layers.setdefault(self.current_layer, {})
+    for cy in range(y, y + height):
+      for cx in range(x, x + width):
+        if self.current_layer == 0:
+          cells[(cx, cy)] = (ord(' '), self.current_color, self.current_bkcolor)
+        else:
+          cells.pop((cx, cy), None)
+
+  def crop(self, x, y, width, height):
+    pass
+
+  def layer(self, index):
+    self.current_layer = index
+
+  def composition(self, mode):
+    self.composition_mode = mode
+
+  def color(self, value):
+    self.current_color = parse_color(value)
+
+  def bkcolor(self, value):
+    self.current_bkcolor = parse_color(value)
+
+  def color_from_name(self, name):
+    return _COLOR_NAMES.get(name.lower(), DEFAULT_FG)
+
+  def color_from_argb(self, a, r, g, b):
+    return (a << 24) | (r << 16) | (g << 8) | b
+
+  def _set_cell(self, x, y, code):
+    if 0 <= x < self.size.width and 0 <= y < self.size.height:
+      self.layers.setdefault(self.current_layer, {})[(x, y)] = (
+        code, self.current_color, self.current_bkcolor)
+
+  def put(self, x, y, code):
+    self.num_draw_calls += 1
+    self._set_cell(x, y, ord(code) if isinstance(code, str) else code)
+
+  def put_ext(self, x, y, dx, dy, code, corners=None):
+    self.put(x, y, code)
+
+  def print(self, x, y, s):
+    self.num_draw_calls += 1
+    lines = _strip_markup(s).split('\n')
+    for i, line in enumerate(lines):
+      for j, char in enumerate(line):
+        self._set_cell(x + j, y + i, ord(char))
+    return Size(max(len(line) for line in lines), len(lines))
+
+  def printf(self, x, y, s, *args):
+    return self.print(x, y, s % args if args else s)
+
+  def measure(self, s):
+    lines = _strip_markup(s).split('\n')
+    return Size(max(len(line) for line in lines), len(lines))
+
+  def pick(self, x, y, index=0):
+    cell = self.get_cell(x, y, self.current_layer)
+    return cell[0] if cell else 0
+
+  def pick_color(self, x, y, index=0):
+    cell = self.get_cell(x, y, self.current_layer)
+    return cell[1] if cell else 0
+
+  def pick_bkcolor(self, x, y):
+    cell = self.get_cell(x, y, 0)
+    return cell[2] if cell else 0
+
+  ### input ###
+
+  def has_input(self):
+    return bool(self.input_queue)
+
+  def peek(self):
+    if not self.input_queue:
+      # the loop is waiting for input the script will never provide, so
+      # "close the window"
+      self.input_queue.append((self.TK_CLOSE, None))
+    return self.input_queue[0][0]
+
+  def read(self):
+    if not self.input_queue:
+      return self.TK_CLOSE
+    event, updates = self.input_queue.popleft()
+    for k, v in (updates or {}).items():
+      setattr(self, k, v)
+    self.last_event = event
+    if event & self.TK_KEY_RELEASED:
+      self.keys_down.discard(event & ~self.TK_KEY_RELEASED)
+    elif event not in (self.TK_MOUSE_MOVE, self.TK_MOUSE_SCROLL,
+                       self.TK_RESIZED, self.TK_CLOSE):
+      self.keys_down.add(event)
+    return event
+
+  def state(self, k):
+    if k == self.TK_WIDTH:
+      return self.size.width
+    elif k == self.TK_HEIGHT:
+      return self.size.height
+    elif k == self.TK_CELL_WIDTH:
+      return self.cell_size.width
+    elif k == self.TK_CELL_HEIGHT:
+      return self.cell_size.height
+    elif k == self.TK_COLOR:
+      return self.current_color
+    elif k == self.TK_BKCOLOR:
+      return self.current_bkcolor
+    elif k == self.TK_LAYER:
+      return self.current_layer
+    elif k == self.TK_COMPOSITION:
+      return self.composition_mode
+    elif k == self.TK_EVENT:
+      return self.last_event
+    elif k in (self.TK_CHAR, self.TK_WCHAR):
+      return self.last_char
+    elif k == self.TK_MOUSE_X:
+      return self.mouse_x
+    elif k == self.TK_MOUSE_Y:
+      return self.mouse_y
+    elif k == self.TK_MOUSE_PIXEL_X:
+      return self.mouse_x * self.cell_size.width
+    elif k == self.TK_MOUSE_PIXEL_Y:
+      return self.mouse_y * self.cell_size.height
+    elif k == self.TK_MOUSE_WHEEL:
+      return self.mouse_wheel
+    elif k == self.TK_FULLSCREEN:
+      return 0
+    else:
+      return 1 if k in self.keys_down else 0
+
+  def check(self, k):
+    return bool(self.state(k))
@@ -1,20 +1,100 @@
 #!/usr/bin/env python
 import asyncio
-from bearlibterminal import terminal
+from collections import deque
+from time import perf_counter
+from .nice_terminal import terminal
 from .state import blt_state
 
 
+# seconds between the first checks for input while idle; the interval doubles
+# up to one frame
+MIN_IDLE_POLL_INTERVAL = 0.001
+
+
+class FrameStats:
+    """
+    Timing for the most recent ``window`` frames. ``frame_time`` is how long
+    ``run_loop_iteration()`` took, and ``interval`` is the time from the start
+    of one frame to the start of the next, including sleeping and idle waits.
+    """
+
+    def __init__(self, window=120):
+        super().__init__()
+        self.frame_times = deque(maxlen=window)
+        self.intervals = deque(maxlen=window)
+        self.num_frames = 0
+        self.num_idle_waits = 0
+
+    def add_frame(self, frame_time, interval=None):
+        self.num_frames += 1
+        self.frame_times.append(frame_time)
+        if interval is not None:
+            self.intervals.append(interval)
+
+    @property
+    def average_frame_time(self):
+        if not self.frame_times:
+            return 0
+        return sum(self.frame_times) / len(self.frame_times)
+
+    @property
+    def max_frame_time(self):
+        return max(self.frame_times, default=0)
+
+    @property
+    def fps(self):
+        """Frames actually started per second, not counting idle waits"""
+        if not self.intervals:
+            return 0
+        return len(self.intervals) / sum(self.intervals)
+
+    def __repr__(self):
+        return 'FrameStats(avg={:.2f}ms, max={:.2f}ms, fps={:.1f}, idle_waits={})'.format(
+            self.average_frame_time * 1000, self.max_frame_time * 1000, self.fps,
+            self.num_idle_waits)
+
+
 class BearLibTerminalEventLoop:
     """
     Simple wrapper around BearLibTerminal and asyncio.
 
     Subclass terminal_init(), terminal_read(), and terminal_update().
     Instantiate your class and call its run() method.
+
+    Frames start at most ``fps`` times per second; after each frame, the loop
+    sleeps for whatever is left of the frame's time budget. If
+    ``block_when_idle`` is true and ``is_idle()`` returns ``True``, the loop
+    instead waits for the next input event, checking ``terminal.peek()``
+    less and less often (but at least once per frame), so an idle game uses
+    almost no CPU. BearLibTerminal is only ever called from the loop's
+    thread. Timing is recorded in ``self.frame_stats``.
+
+    Before input is passed to ``terminal_read()``, bursts of redundant events
+    are coalesced if ``coalesce_events`` is true: a run of consecutive
+    ``TK_RESIZED`` or ``TK_MOUSE_MOVE`` events is delivered as just the last
+    one, and a key pressed more than ``max_key_repeats`` times in one frame
+    without being released (i.e. held down while frames are slow) has the
+    extra presses dropped (mouse buttons and scrolling are never dropped).
+    At most ``max_events_per_frame`` events are read per frame; the rest wait
+    for the next frame. Either limit may be ``None``.
     """
 
-    def __init__(self, fps=72):
+    def __init__(
+            self, fps=72, snapshot_state=False, block_when_idle=True,
+            coalesce_events=True, max_key_repeats=3, max_events_per_frame=64):
         super().__init__()
         self.fps = fps
+        self.block_when_idle = block_when_idle
+        self.coalesce_events = coalesce_events
+        self.max_key_repeats = max_key_repeats
+        self.max_events_per_frame = max_events_per_frame
+        self.frame_stats = FrameStats()
+        # If True, blt_state is captured once per frame instead of calling
+        # terminal.state() on every access. See clubsandwich.blt.state.
+        self.snapshot_state = snapshot_state
+        # Subclasses may set this to False in terminal_update() if nothing
+        # was drawn, to skip terminal.refresh().
+        self.needs_refresh = True
 
     def terminal_init(self):
         """
@@ -36,34 +116,117 @@ class BearLibTerminalEventLoop:
         """
         return True
 
+    def is_idle(self):
+        """
+        Return ``True`` if nothing will change on screen until there is input.
+        Checked after each frame.
+        """
+        return False
+
     def run(self):
         terminal.open()
         self.terminal_init()
+        if self.snapshot_state:
+            blt_state.enable_snapshot()
         terminal.refresh()
 
         try:
-            asyncio_loop = asyncio.get_event_loop()
-            asyncio_loop.run_until_complete(self.loop_until_terminal_exits())
+            asyncio.run(self.loop_until_terminal_exits())
         except KeyboardInterrupt:
             pass
         finally:
             terminal.close()
 
     async def loop_until_terminal_exits(self):
+        last_start = None
+        deadline = None
         try:
-            while self.run_loop_iteration():
-                await asyncio.sleep(1/80)
+            while True:
+                start = perf_counter()
+                if not self.run_loop_iteration():
+                    break
+                end = perf_counter()
+                self.frame_stats.add_frame(
+                    end - start, None if last_start is None else start - last_start)
+                last_start = start
+
+                if self.block_when_idle and self.is_idle():
+                    self.frame_stats.num_idle_waits += 1
+                    await self._wait_for_input()
+                    # don't count the idle wait as a slow frame
+                    last_start = None
+                    deadline = None
+                    continue
+
+                # Aim each frame at a fixed schedule so that oversleeping one
+                # frame is made up by the next. If a frame ran long, start the
+                # schedule over rather than rushing to catch up.
+                deadline = (deadline or start) + 1 / self.fps
+                now = perf_counter()
+                if deadline < now:
+                    deadline = now
+                await asyncio.sleep(deadline - now)
         except KeyboardInterrupt:
             pass
 
-    def run_loop_iteration(self):
+    async def _wait_for_input(self):
+        delay = MIN_IDLE_POLL_INTERVAL
+        max_delay = max(delay, 1 / self.fps)
+        # like has_input(), but lets HeadlessTerminal end the loop once its
+        # script runs out
+        while not terminal.peek():
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_delay)
+
+    def _read_frame_events(self):
+        """
+        Yield this frame's input events after coalescing them. Coalescing only
+        looks ahead with ``terminal.peek()``, so terminal state read while
+        handling an event still matches that event.
+        """
+        num_read = 0
+        repeated_key = None
+        num_repeats = 0
         while terminal.has_input():
+            if self.max_events_per_frame is not None and (
+                    num_read >= self.max_events_per_frame):
+                return
             char = terminal.read()
+            num_read += 1
+
+            if not self.coalesce_events:
+                pass
+            elif char == terminal.TK_RESIZED or char == terminal.TK_MOUSE_MOVE:
+                while terminal.has_input() and terminal.peek() == char:
+                    terminal.read()
+                    num_read += 1
+            elif char & terminal.TK_KEY_RELEASED:
+                repeated_key = None
+            elif char >= terminal.TK_MOUSE_LEFT:
+                pass
+            elif char == repeated_key:
+                num_repeats += 1
+                if self.max_key_repeats is not None and (
+                        num_repeats >= self.max_key_repeats):
+                    continue
+            else:
+                repeated_key = char
+                num_repeats = 0
+            yield char
+
+    def run_loop_iteration(self):
+        snapshot = blt_state.snapshot
+        if snapshot is not None:
+            snapshot.capture()
+        for char in self._read_frame_events():
+            if snapshot is not None:
+                snapshot.update(char)
             if char == terminal.TK_CLOSE:
                 return False
             if char == terminal.TK_C and blt_state.control:
                 return False
             self.terminal_read(char)
         should_continue = self.terminal_update()
-        terminal.refresh()
+        if self.needs_refresh:
+            terminal.refresh()
         return should_continue
\ No newline at end of file
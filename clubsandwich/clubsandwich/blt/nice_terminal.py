@@ -1,10 +1,26 @@
 from bearlibterminal import terminal as _terminal
 from clubsandwich.geom import Point, Rect
 
+
+def set_backend(backend):
+  """
+  Send all ``NiceTerminal`` calls, and therefore all of clubsandwich's terminal
+  calls, to ``backend`` instead of ``bearlibterminal.terminal``. ``backend``
+  must provide the same functions and ``TK_*`` constants, like
+  ``clubsandwich.blt.headless.HeadlessTerminal``.
+  """
+  global _terminal
+  _terminal = backend
+
+
+def get_backend():
+  return _terminal
+
+
 class NiceTerminal:
   """
   Like bearlibterminal.terminal, but some functions support geom.py data
-  structures
+  structures. Calls go to the current backend; see ``set_backend()``.
   """
   def __getattr__(self, k):
     return getattr(_terminal, k)
@@ -4,22 +4,98 @@ state keys. When you access a property, ``terminal_state(THE_CONST)`` is
 called and its value is returned.
 
 For example, ``blt_state.shift`` returns ``True`` iff the Shift key is down.
+
+If you call ``blt_state.enable_snapshot()`` (``BearLibTerminalEventLoop``
+does this if you pass ``snapshot_state=True``), the keys in
+``SNAPSHOT_KEYS`` are instead read from ``blt_state.snapshot``, which is
+captured once per frame and kept up to date as events are read, so reading
+them does not call into BearLibTerminal. Other keys are still read live.
 """
+from functools import lru_cache
+
 from bearlibterminal import terminal
+from .nice_terminal import terminal as _nice_terminal
+
+
+SNAPSHOT_KEYS = (
+    'width', 'height', 'cell_width', 'cell_height',
+    'shift', 'control', 'alt',
+    'mouse_x', 'mouse_y',
+)
+
+
+@lru_cache(maxsize=None)
+def _get_constant(k):
+    try:
+        return getattr(terminal, 'TK_' + k.upper())
+    except AttributeError:
+        raise AttributeError(k) from None
+
+
+class TerminalStateSnapshot:
+    """
+    Plain attributes holding the values of ``SNAPSHOT_KEYS``. Call
+    ``capture()`` to read them all from the terminal, and ``update(event)``
+    after each ``terminal.read()`` to keep them current until the next
+    capture.
+    """
+    __slots__ = SNAPSHOT_KEYS
+
+    def __init__(self):
+        for k in SNAPSHOT_KEYS:
+            setattr(self, k, 0)
+
+    def capture(self):
+        state = _nice_terminal.state
+        for k in SNAPSHOT_KEYS:
+            setattr(self, k, state(_get_constant(k)))
+
+    def update(self, event):
+        key = event & ~terminal.TK_KEY_RELEASED
+        is_down = 0 if event & terminal.TK_KEY_RELEASED else 1
+        if key == terminal.TK_SHIFT:
+            self.shift = is_down
+        elif key == terminal.TK_CONTROL:
+            self.control = is_down
+        elif key == terminal.TK_ALT:
+            self.alt = is_down
+        elif terminal.TK_MOUSE_LEFT <= key <= terminal.TK_MOUSE_SCROLL:
+            self.mouse_x = _nice_terminal.state(terminal.TK_MOUSE_X)
+            self.mouse_y = _nice_terminal.state(terminal.TK_MOUSE_Y)
+        elif event == terminal.TK_RESIZED:
+            self.capture()
 
 
 class _TerminalState:
-    pass
+    def __init__(self):
+        self.snapshot = None
+
+    def enable_snapshot(self):
+        if self.snapshot is None:
+            self.snapshot = TerminalStateSnapshot()
+        self.snapshot.capture()
+
+    def disable_snapshot(self):
+        self.snapshot = None
+
+    def __getattr__(self, k):
+        if k.startswith('__'):
+            raise AttributeError(k)
+        return _nice_terminal.state(_get_constant(k))
+
+    def __dir__(self):
+        return sorted(set(super().__dir__()) | {
+            c[3:].lower() for c in dir(terminal) if c.startswith('TK_')})
 
-for constant_key in (c for c in dir(terminal) if c.startswith('TK_')):
+# Snapshot keys are real properties so that reading them from a snapshot
+# doesn't go through __getattr__.
+for snapshot_key in SNAPSHOT_KEYS:
     def getter(k):
-        constant_value = getattr(terminal, k)
         def get(self):
-            return terminal.state(constant_value)
+            if self.snapshot is not None:
+                return getattr(self.snapshot, k)
+            return _nice_terminal.state(_get_constant(k))
         return get
-    setattr(
-        _TerminalState,
-        constant_key[3:].lower(),
-        property(getter(constant_key)))
+    setattr(_TerminalState, snapshot_key, property(getter(snapshot_key)))
 
-blt_state = _TerminalState()
\ No newline at end of file
+blt_state = _TerminalState()
@@ -1,31 +1,71 @@
 import weakref
 
-from bearlibterminal import terminal
-
+from clubsandwich.blt.cell_buffer import CellBuffer
+from clubsandwich.blt.context import BearLibTerminalContext
 from clubsandwich.blt.loop import BearLibTerminalEventLoop
+from clubsandwich.blt.nice_terminal import terminal
+from clubsandwich.blt.state import blt_state
+from clubsandwich.geom import Point, Rect, Size
 
 
 class DirectorLoop(BearLibTerminalEventLoop):
-    def __init__(self):
-        super().__init__()
+    """
+    Manages a stack of scenes. If ``compositor`` is true, scenes draw into an
+    off-screen ``CellBuffer`` via ``self.ctx`` and only changed cells are sent
+    to the terminal at the end of each frame. In that mode, scenes must do all
+    their drawing through ``self.director().ctx``.
+
+    Only ``visible_scenes`` are laid out and drawn: scenes below one whose
+    ``covers_screen`` is true are skipped. In compositor mode, when the top
+    scene doesn't cover the screen, the scenes under it are drawn once into a
+    backdrop buffer, and frames where only the top scene changed restore the
+    backdrop instead of redrawing them.
+
+    Each scene draws on the terminal layers in its ``layers``. Layers are
+    cleared and redrawn separately, only where their own scenes changed, so a
+    popup on a higher layer can animate without the scenes under it being
+    drawn again. Backdrops are kept per layer.
+
+    Other keyword arguments are passed to ``BearLibTerminalEventLoop``.
+    """
+    def __init__(self, compositor=False, **kwargs):
+        super().__init__(**kwargs)
         self.should_exit = False
         self.scene_stack = []
+        self.ctx = BearLibTerminalContext(
+            buffer=CellBuffer() if compositor else None)
+        self.needs_full_redraw = True
+        # layer -> cells drawn on that layer by every scene except the top
+        # one drawing on it (compositor mode only)
+        self._backdrops = {}
 
     @property
     def active_scene(self):
         return self.scene_stack[-1]
 
+    @property
+    def visible_scenes(self):
+        """
+        The topmost scene that covers the screen and every scene above it
+        """
+        for i in range(len(self.scene_stack) - 1, -1, -1):
+            if self.scene_stack[i].covers_screen:
+                return self.scene_stack[i:]
+        return self.scene_stack
+
     def replace_scene(self, new_value):
         self.pop_scene(may_exit=False)
         self.push_scene(new_value)
 
     def push_scene(self, new_value):
+        self.needs_full_redraw = True
         self.scene_stack.append(new_value)
         new_value.director = weakref.ref(self)
         new_value.enter()
 
     def pop_scene(self, may_exit=True):
         if self.scene_stack:
+            self.needs_full_redraw = True
             last_scene = self.scene_stack.pop()
             last_scene.exit()
             last_scene.director = lambda: None
@@ -43,13 +83,112 @@ class DirectorLoop(BearLibTerminalEventLoop):
         super().terminal_init()
         self.replace_scene(self.get_initial_scene())
 
+    def get_dirty_rect(self):
+        """
+        Returns the union of all visible scenes' dirty rects, or ``None`` if
+        nothing needs to be drawn. Returns ``True`` if the whole screen needs to
+        be drawn.
+        """
+        if self.needs_full_redraw:
+            return True
+        return self._get_dirty_rect(self.visible_scenes)
+
+    def _get_dirty_rect(self, scenes):
+        dirty_rect = None
+        for scene in scenes:
+            if not scene.needs_display:
+                continue
+            if scene.dirty_rect is None:
+                return True
+            if dirty_rect is None:
+                dirty_rect = scene.dirty_rect
+            else:
+                dirty_rect = dirty_rect.union(scene.dirty_rect)
+        return dirty_rect
+
+    def is_idle(self):
+        return self.get_dirty_rect() is None
+
+    def _draw_scenes(self, scenes):
+        for scene in scenes:
+            with self.ctx.temporary_layer(scene.layer):
+                scene.terminal_update(scene == self.scene_stack[-1])
+
     def terminal_update(self):
-        terminal.clear()
-        for scene in self.scene_stack:
-            scene.terminal_update(scene == self.scene_stack[-1])
+        scenes = self.visible_scenes
+        for scene in scenes:
+            scene.terminal_layout()
+
+        scenes_by_layer = {}
+        for scene in scenes:
+            for layer in scene.layers:
+                scenes_by_layer.setdefault(layer, []).append(scene)
+        # drawing resets the scenes' dirty state, so find everything that
+        # needs drawing before drawing anything
+        changed_scenes = {scene for scene in scenes if scene.needs_display}
+        dirty_rects = {}
+        for layer, layer_scenes in scenes_by_layer.items():
+            dirty_rect = (
+                True if self.needs_full_redraw else
+                self._get_dirty_rect(layer_scenes))
+            if dirty_rect is not None:
+                dirty_rects[layer] = dirty_rect
+
+        self.needs_refresh = bool(dirty_rects)
+        if not self.needs_refresh:
+            return not self.should_exit
+        # scenes may also draw without the context
+        self.ctx.invalidate_color_state()
+        screen_rect = Rect(Point(0, 0), Size(blt_state.width, blt_state.height))
+        if self.needs_full_redraw:
+            self.needs_full_redraw = False
+            self._backdrops = {}
+            self.ctx.resize_buffers(screen_rect.size)
+            # a full clear fills the screen with the terminal's bkcolor
+            self.ctx.reset_colors()
+            self.ctx.clear()
+        for layer in sorted(dirty_rects):
+            dirty_rect = dirty_rects[layer]
+            self._draw_layer(
+                layer, scenes_by_layer[layer], changed_scenes,
+                screen_rect if dirty_rect is True else dirty_rect)
+            # don't let colors set by one layer's scenes leak into the next
+            self.ctx.reset_colors()
+        self.ctx.layer(0)
+
+        if self.ctx.buffer is not None:
+            self.needs_refresh = self.ctx.flush() > 0
         return not self.should_exit
 
+    def _draw_layer(self, layer, scenes, changed_scenes, dirty_rect):
+        ctx = self.ctx
+        lower_scenes = scenes[:-1]
+        use_backdrop = ctx.buffer is not None and bool(lower_scenes)
+        backdrop = self._backdrops.get(layer) if use_backdrop else None
+        if not use_backdrop:
+            self._backdrops.pop(layer, None)
+        elif backdrop is None:
+            dirty_rect = Rect(Point(0, 0), ctx.buffer.size)
+
+        with ctx.isolate_layer(layer), ctx.clip(dirty_rect):
+            buffer = ctx.buffer
+            if backdrop is not None and changed_scenes.isdisjoint(lower_scenes):
+                buffer.copy_area_from(
+                    backdrop, *dirty_rect.origin, *dirty_rect.size)
+            else:
+                ctx.clear_area(dirty_rect)
+                self._draw_scenes(lower_scenes)
+                if backdrop is not None:
+                    backdrop.copy_area_from(
+                        buffer, *dirty_rect.origin, *dirty_rect.size)
+                elif use_backdrop:
+                    self._backdrops[layer] = buffer.copy()
+            self._draw_scenes(scenes[-1:])
+
     def terminal_read(self, char):
+        if char == terminal.TK_RESIZED:
+            self.needs_full_redraw = True
+            self.ctx.invalidate_buffers()
         if self.scene_stack:
             return self.active_scene.terminal_read(char)
 
@@ -59,7 +198,10 @@ class Scene():
         super().__init__()
         self.director = lambda: None
         self.terminal_readers = []
+        # If True, scenes below this one can't be seen and aren't drawn
         self.covers_screen = True
+        # The terminal layer to draw on. Only layer 0 shows background colors.
+        self.layer = 0
 
     def add_terminal_reader(self, reader):
         if not getattr(reader, 'terminal_read'):
@@ -75,7 +217,45 @@ class Scene():
     def exit(self):
         pass
 
+    def terminal_layout(self):
+        """
+        Called every frame, while this scene is visible, before any scene is
+        drawn. Views should be laid out here so that the director knows what
+        needs to be redrawn.
+        """
+        pass
+
+    @property
+    def layers(self):
+        """
+        Every layer this scene draws on. When the scene changes, its dirty
+        area is cleared on each of them and every scene drawing on them is
+        redrawn there.
+        """
+        return (self.layer,)
+
+    @property
+    def needs_display(self):
+        """
+        Return ``False`` if this scene has not changed since it was last drawn.
+        By default, scenes are redrawn every frame. When no scene needs
+        display, the director is idle and waits for input between frames.
+        """
+        return True
+
+    @property
+    def dirty_rect(self):
+        """
+        If ``needs_display`` is true, the area of the screen that needs to be
+        redrawn, or ``None`` to redraw the whole screen.
+        """
+        return None
+
     def terminal_update(self, is_active=False):
+        """
+        Draw the scene. If only part of the screen is being redrawn,
+        ``self.director().ctx`` is clipped to that area.
+        """
         return True
 
     def terminal_read(self, char):
@@ -1,119 +1,143 @@
+from collections import namedtuple
 from math import floor
+from numbers import Integral
+from operator import itemgetter
 
-class Point:
-  __slots__ = ('x', 'y')
 
-  def __init__(self, x=0, y=0):
-    super().__init__()
-    self.x = x
-    self.y = y
+def _numpy():
+  # numpy is optional and slow to import, so only load it when an array type
+  # is actually used.
+  try:
+    import numpy
+  except ImportError:
+    raise ImportError(
+      "PointArray and RectArray require numpy. "
+      "Install clubsandwich[numpy].") from None
+  return numpy
+
+
+_Point = namedtuple('_Point', ['x', 'y'])
+_Rect = namedtuple('_Rect', ['origin', 'size'])
+_tuple_new = tuple.__new__
+_tuple_eq = tuple.__eq__
+
+
+class Point(_Point):
+  """
+  An immutable, hashable ``(x, y)`` pair. Arithmetic returns a new value of
+  the same class as the left operand.
+
+  Points only compare equal to other points (including sizes), never to
+  plain tuples.
+  """
+  __slots__ = ()
+
+  def __new__(cls, x=0, y=0):
+    return _tuple_new(cls, (x, y))
+
+  def __repr__(self):
+    return 'Point({}, {})'.format(self[0], self[1])
 
   def __eq__(self, other):
     if not isinstance(other, Point):
-        return False
-    return self.x == other.x and self.y == other.y
+      return False
+    return _tuple_eq(self, other)
 
-  def __repr__(self):
-    return 'Point({}, {})'.format(self.x, self.y)
+  def __ne__(self, other):
+    return not self == other
+
+  __hash__ = tuple.__hash__
 
   @property
   def floored(self):
-    return self.__class__(floor(self.x), floor(self.y))
+    x, y = self
+    if type(x) is int and type(y) is int:
+      return self
+    return _tuple_new(self.__class__, (floor(x), floor(y)))
 
   def __add__(self, other):
-    return self.__class__(self.x + other.x, self.y + other.y)
+    return _tuple_new(self.__class__, (self[0] + other[0], self[1] + other[1]))
 
   def __mul__(self, other):
     if isinstance(other, Point):
-      return self.__class__(self.x * other.x, self.y * other.y)
+      return _tuple_new(self.__class__, (self[0] * other[0], self[1] * other[1]))
     else:
-      return self.__class__(self.x * other, self.y * other)
+      return _tuple_new(self.__class__, (self[0] * other, self[1] * other))
+
+  __rmul__ = __mul__
 
   def __sub__(self, other):
-    return self + (other * -1)
+    return _tuple_new(self.__class__, (self[0] - other[0], self[1] - other[1]))
 
   def __truediv__(self, other):
     if isinstance(other, Point):
-      return self.__class__(self.x / other.x, self.y / other.y)
+      return _tuple_new(self.__class__, (self[0] / other[0], self[1] / other[1]))
     else:
-      return self.__class__(self.x / other, self.y / other)
+      return _tuple_new(self.__class__, (self[0] / other, self[1] / other))
 
 
 class Size(Point):
-  def __init__(self, width=0, height=0):
-    super().__init__(x=width, y=height)
+  __slots__ = ()
+
+  def __new__(cls, width=0, height=0):
+    return _tuple_new(cls, (width, height))
 
   @property
   def point(self):
-    return Point(self.width, self.height)
+    return Point(self[0], self[1])
 
-  @property
-  def width(self):
-    return self.x
+  width = property(itemgetter(0))
+  height = property(itemgetter(1))
 
-  @width.setter
-  def width(self, value):
-    self.x = value
+  def __repr__(self):
+    return 'Size({}, {})'.format(self[0], self[1])
 
-  @property
-  def height(self):
-    return self.y
 
-  @height.setter
-  def height(self, value):
-    self.y = value
+_ZERO_POINT = Point(0, 0)
+_ZERO_SIZE = Size(0, 0)
 
-  def __repr__(self):
-    return 'Size({}, {})'.format(self.width, self.height)
 
+class Rect(_Rect):
+  """
+  An immutable, hashable ``(origin, size)`` pair. Rects only compare equal to
+  other rects, and ``point in rect`` is the same as ``rect.contains(point)``.
+  """
+  __slots__ = ()
 
-class Rect:
-  __slots__ = ('origin', 'size')
+  def __new__(cls, origin=None, size=None):
+    return _tuple_new(cls, (origin or _ZERO_POINT, size or _ZERO_SIZE))
 
-  def __init__(self, origin=None, size=None):
-    super().__init__()
-    self.origin = origin or Point()
-    self.size = size or Size()
+  def __repr__(self):
+    return 'Rect({!r}, {!r})'.format(self[0], self[1])
 
   def __eq__(self, other):
     if not isinstance(other, Rect):
       return False
-    return self.origin == other.origin and self.size == other.size
+    return _tuple_eq(self, other)
 
-  def __repr__(self):
-    return 'Rect({!r}, {!r})'.format(self.origin, self.size)
+  def __ne__(self, other):
+    return not self == other
+
+  __hash__ = tuple.__hash__
+
+  def __contains__(self, point):
+    return self.contains(point)
 
   @property
   def x(self):
-    return self.origin.x
-
-  @x.setter
-  def x(self, new_value):
-    self.origin = Point(new_value, self.y)
+    return self[0][0]
 
   @property
   def y(self):
-    return self.origin.y
-
-  @y.setter
-  def y(self, new_value):
-    self.origin = Point(self.x, new_value)
+    return self[0][1]
 
   @property
   def width(self):
-    return self.size.width
-
-  @width.setter
-  def width(self, new_value):
-    self.size = Size(new_value, self.height)
+    return self[1][0]
 
   @property
   def height(self):
-    return self.size.height
-
-  @height.setter
-  def height(self, new_value):
-    self.size = Size(self.width, new_value)
+    return self[1][1]
 
   @property  # no setter; it's not clear if it would change origin or size
   def x2(self):
@@ -123,6 +147,24 @@ class Rect:
   def y2(self):
     return self.origin.y + self.size.height - 1
 
+  ### predicates ###
+
+  @property
+  def is_empty(self):
+    return self.size.width <= 0 or self.size.height <= 0
+
+  def contains(self, point):
+    return (
+      self.origin.x <= point.x < self.origin.x + self.size.width and
+      self.origin.y <= point.y < self.origin.y + self.size.height)
+
+  def intersects(self, other):
+    return (
+      self.origin.x < other.origin.x + other.size.width and
+      other.origin.x < self.origin.x + self.size.width and
+      self.origin.y < other.origin.y + other.size.height and
+      other.origin.y < self.origin.y + self.size.height)
+
   ### handy iterators ###
 
   @property
@@ -188,16 +230,223 @@ class Rect:
 
   @property
   def floored(self):
-    return Rect(self.origin.floored, self.size.floored)
+    origin, size = self
+    floored_origin = origin.floored
+    floored_size = size.floored
+    if floored_origin is origin and floored_size is size:
+      return self
+    return _tuple_new(Rect, (floored_origin, floored_size))
 
   def moved_by(self, delta):
-    return Rect(self.origin + delta, self.size)
+    return _tuple_new(Rect, (self[0] + delta, self[1]))
 
   def with_origin(self, new_origin):
-    return Rect(new_origin, self.size)
+    return _tuple_new(Rect, (new_origin, self[1]))
 
   def with_size(self, new_size):
-    return Rect(self.origin, new_size)
+    return _tuple_new(Rect, (self[0], new_size))
 
   def with_inset(self, inset):
     return Rect(self.origin + inset, self.size - inset * 2)
+
+  def intersection(self, other):
+    """Returns the overlapping area, which may be empty"""
+    x = max(self.origin.x, other.origin.x)
+    y = max(self.origin.y, other.origin.y)
+    x2 = min(self.origin.x + self.size.width, other.origin.x + other.size.width)
+    y2 = min(self.origin.y + self.size.height, other.origin.y + other.size.height)
+    return Rect(Point(x, y), Size(max(0, x2 - x), max(0, y2 - y)))
+
+  def union(self, other):
+    """Returns the smallest rect containing both rects. Empty rects are ignored."""
+    if other.is_empty:
+      return self
+    if self.is_empty:
+      return other
+    x = min(self.origin.x, other.origin.x)
+    y = min(self.origin.y, other.origin.y)
+    x2 = max(self.origin.x + self.size.width, other.origin.x + other.size.width)
+    y2 = max(self.origin.y + self.size.height, other.origin.y + other.size.height)
+    return Rect(Point(x, y), Size(x2 - x, y2 - y))
+
+
+### bulk types ###
+
+class PointArray:
+  """
+  Many points stored as an ``(n, 2)`` NumPy array of ``(x, y)`` rows, so they
+  can be moved and tested against rects without creating a ``Point`` per
+  item. Requires numpy.
+  """
+  __slots__ = ('xy',)
+
+  def __init__(self, xy=None):
+    np = _numpy()
+    if xy is None:
+      xy = np.zeros((0, 2), dtype=int)
+    self.xy = np.asarray(xy).reshape(-1, 2)
+
+  @classmethod
+  def from_points(cls, points):
+    xy = [(p.x, p.y) for p in points]
+    # numpy would make an empty array float64
+    return cls(_numpy().array(xy, dtype=None if xy else int).reshape(-1, 2))
+
+  @classmethod
+  def from_rect(cls, rect):
+    """All cells in ``rect``, in the same order as ``Rect.points``"""
+    np = _numpy()
+    xs, ys = np.meshgrid(
+      np.arange(rect.origin.x, rect.origin.x + rect.size.width),
+      np.arange(rect.origin.y, rect.origin.y + rect.size.height),
+      indexing='ij')
+    return cls(np.stack([xs.ravel(), ys.ravel()], axis=1))
+
+  def to_points(self):
+    return [Point(x, y) for x, y in self.xy.tolist()]
+
+  def __len__(self):
+    return len(self.xy)
+
+  def __iter__(self):
+    return iter(self.to_points())
+
+  def __getitem__(self, index):
+    """An integer index returns a ``Point``; a slice or mask returns a ``PointArray``"""
+    if isinstance(index, Integral):
+      x, y = self.xy[index].tolist()
+      return Point(x, y)
+    return PointArray(self.xy[index])
+
+  def __repr__(self):
+    return 'PointArray({!r})'.format(self.xy.tolist())
+
+  @property
+  def x(self):
+    return self.xy[:, 0]
+
+  @property
+  def y(self):
+    return self.xy[:, 1]
+
+  @property
+  def floored(self):
+    return PointArray(_numpy().floor(self.xy).astype(int))
+
+  def __add__(self, other):
+    return PointArray(self.xy + _as_xy(other))
+
+  def __sub__(self, other):
+    return PointArray(self.xy - _as_xy(other))
+
+  def moved_by(self, delta):
+    return self + delta
+
+  def get_is_in_rect(self, rect):
+    """Returns a boolean mask of the points inside ``rect``"""
+    x = self.xy[:, 0]
+    y = self.xy[:, 1]
+    return (
+      (x >= rect.origin.x) & (x < rect.origin.x + rect.size.width) &
+      (y >= rect.origin.y) & (y < rect.origin.y + rect.size.height))
+
+  def clipped_to(self, rect):
+    """Returns only the points inside ``rect``"""
+    return PointArray(self.xy[self.get_is_in_rect(rect)])
+
+
+class RectArray:
+  """
+  Many rects stored as an ``(n, 4)`` NumPy array of ``(x, y, width, height)``
+  rows. Requires numpy.
+  """
+  __slots__ = ('xywh',)
+
+  def __init__(self, xywh=None):
+    np = _numpy()
+    if xywh is None:
+      xywh = np.zeros((0, 4), dtype=int)
+    self.xywh = np.asarray(xywh).reshape(-1, 4)
+
+  @classmethod
+  def from_rects(cls, rects):
+    xywh = [
+      (r.origin.x, r.origin.y, r.size.width, r.size.height) for r in rects]
+    # numpy would make an empty array float64
+    return cls(_numpy().array(xywh, dtype=None if xywh else int).reshape(-1, 4))
+
+  def to_rects(self):
+    return [Rect(Point(x, y), Size(w, h)) for x, y, w, h in self.xywh.tolist()]
+
+  def __len__(self):
+    return len(self.xywh)
+
+  def __iter__(self):
+    return iter(self.to_rects())
+
+  def __getitem__(self, index):
+    """An integer index returns a ``Rect``; a slice or mask returns a ``RectArray``"""
+    if isinstance(index, Integral):
+      x, y, w, h = self.xywh[index].tolist()
+      return Rect(Point(x, y), Size(w, h))
+    return RectArray(self.xywh[index])
+
+  def __repr__(self):
+    return 'RectArray({!r})'.format(self.xywh.tolist())
+
+  @property
+  def origins(self):
+    return PointArray(self.xywh[:, 0:2])
+
+  @property
+  def sizes(self):
+    return PointArray(self.xywh[:, 2:4])
+
+  @property
+  def is_empty(self):
+    """Boolean mask of rects with no area"""
+    return (self.xywh[:, 2] <= 0) | (self.xywh[:, 3] <= 0)
+
+  def moved_by(self, delta):
+    np = _numpy()
+    return RectArray(np.concatenate(
+      [self.xywh[:, 0:2] + _as_xy(delta), self.xywh[:, 2:4]], axis=1))
+
+  def contains(self, point):
+    """Boolean mask of rects containing ``point``"""
+    x, y, w, h = self.xywh.T
+    return (
+      (x <= point.x) & (point.x < x + w) &
+      (y <= point.y) & (point.y < y + h))
+
+  def intersects(self, rect):
+    """Boolean mask of rects overlapping ``rect``"""
+    x, y, w, h = self.xywh.T
+    return (
+      (x < rect.origin.x + rect.size.width) & (rect.origin.x < x + w) &
+      (y < rect.origin.y + rect.size.height) & (rect.origin.y < y + h))
+
+  def intersection(self, rect):
+    """Each rect intersected with ``rect``. Non-overlapping rects become empty."""
+    np = _numpy()
+    x, y, w, h = self.xywh.T
+    x1 = np.maximum(x, rect.origin.x)
+    y1 = np.maximum(y, rect.origin.y)
+    x2 = np.minimum(x + w, rect.origin.x + rect.size.width)
+    y2 = np.minimum(y + h, rect.origin.y + rect.size.height)
+    return RectArray(np.stack([
+      x1, y1, np.maximum(0, x2 - x1), np.maximum(0, y2 - y1)], axis=1))
+
+  def clipped_to(self, rect):
+    """Like ``intersection()``, but drops rects that end up empty"""
+    clipped = self.intersection(rect)
+    return clipped[~clipped.is_empty]
+
+
+def _as_xy(value):
+  if isinstance(value, Point):
+    return (value.x, value.y)
+  elif isinstance(value, PointArray):
+    return value.xy
+  else:
+    return value
@@ -1,5 +1,47 @@
-from .view import *
-from .firstrespondercontainerview import *
-from .misc_views import *
-from .collection_list import *
-from .layout_options import *
\ No newline at end of file
+"""
+The view system. Submodules are imported the first time one of their names
+is used, so importing ``clubsandwich.ui`` is nearly free.
+"""
+from importlib import import_module
+
+
+# each submodule's __all__, copied so that nothing has to be imported to know
+# where a name lives (tests/test_ui_exports.py checks that they match)
+_EXPORTS = {
+  '.view': ['ZERO_RECT', 'SubviewList', 'View'],
+  '.firstrespondercontainerview': ['FirstResponderContainerView'],
+  '.misc_views': [
+    'temporary_color', 'measure_text', 'RectView', 'WindowView', 'LabelView',
+    'StackView', 'GridView', 'ButtonView',
+  ],
+  '.collection_list': [
+    'ListViewDataSource', 'LabelControlPairsDataSource', 'ListView',
+  ],
+  '.layout_options': ['LayoutOptions'],
+  '.layout_engines': [
+    'apply_springs_and_struts_layout_to_view', 'distribute', 'LayoutEngine',
+    'SpringsAndStrutsLayout', 'SPRINGS_AND_STRUTS', 'StackLayout', 'GridLayout',
+  ],
+  '.hit_testing': ['SpatialGrid', 'hit_test'],
+  '.ui_scene': ['UIScene'],
+}
+_MODULE_BY_NAME = {
+  name: module_name
+  for module_name, names in _EXPORTS.items()
+  for name in names}
+
+__all__ = list(_MODULE_BY_NAME)
+
+
+def __getattr__(name):
+  module_name = _MODULE_BY_NAME.get(name)
+  if module_name is None:
+    raise AttributeError(
+      'module {!r} has no attribute {!r}'.format(__name__, name))
+  value = getattr(import_module(module_name, __name__), name)
+  globals()[name] = value
+  return value
+
+
+def __dir__():
+  return sorted(set(globals()) | set(__all__))
@@ -7,18 +7,114 @@ from clubsandwich.blt.nice_terminal import terminal
 from clubsandwich.blt.state import blt_state
 from clubsandwich.geom import Rect, Point, Size
 
+__all__ = ['ListViewDataSource', 'LabelControlPairsDataSource', 'ListView']
+
+
+class ListViewDataSource:
+  """
+  Supplies the rows of a ``ListView``. A row is a ``(label_view, value_view)``
+  pair. Subclass and implement ``get_num_rows()``, ``create_row()``, and
+  ``bind_row()``.
+
+  If ``recycles_rows`` is true, rows that scroll out of view are reused for
+  other indexes by passing them to ``bind_row()`` again, so a long list only
+  ever creates about a screenful of rows.
+  """
+  recycles_rows = True
+
+  def get_num_rows(self):
+    raise NotImplementedError()
+
+  def create_row(self, index):
+    """
+    Return a new ``(label_view, value_view)`` pair. ``bind_row()`` is called
+    on it before it is shown.
+    """
+    raise NotImplementedError()
+
+  def bind_row(self, row, index):
+    """Update the views in ``row`` to show row ``index``"""
+    pass
+
+
+class LabelControlPairsDataSource(ListViewDataSource):
+  """
+  Rows from a list of ``(label_text, control_view)`` pairs. Controls belong to
+  a single row, so rows aren't recycled.
+  """
+  recycles_rows = False
+
+  def __init__(self, label_control_pairs):
+    super().__init__()
+    self.label_control_pairs = list(label_control_pairs)
+    self._labels = {}
+
+  def get_num_rows(self):
+    return len(self.label_control_pairs)
+
+  def create_row(self, index):
+    text, control = self.label_control_pairs[index]
+    label = self._labels.get(control)
+    if label is None:
+      label = self._labels[control] = LabelView(text)
+    return (label, control)
+
 
 class ListView(RectView):
-  def __init__(self, label_control_pairs, value_column_width=16, *args, **kwargs):
+  """
+  A scrolling list of rows, each a label plus a control (usually a
+  ``ButtonView``) in a column ``value_column_width`` cells wide.
+
+  Rows come from ``data_source``, a ``ListViewDataSource``. You may instead
+  pass a list of ``(label_text, control_view)`` pairs as the first argument.
+  Only visible rows, plus the focused one, exist as subviews, so layout,
+  scrolling, and moving focus don't get slower as the list gets longer.
+
+  If the data source's rows change, tell the list with ``insert_rows()``,
+  ``remove_rows()``, or ``move_row()``, which keep existing row views (and
+  focus) attached to the same items, or with ``reload_data()``, which rebinds
+  everything. Rows that only change position are not rebound.
+  """
+  def __init__(
+      self, label_control_pairs=None, value_column_width=16, *args,
+      data_source=None, **kwargs):
     super().__init__(subviews=[], *args, **kwargs)
+    if data_source is None:
+      data_source = LabelControlPairsDataSource(label_control_pairs or [])
+    self.data_source = data_source
     self._min_row = 0
     self.value_column_width = value_column_width
-    self.first_responder_index = None
+    self._focused_row = None
+    self._num_rows = data_source.get_num_rows()
+    self._rows = {}  # index -> (label_view, value_view)
+    self._row_index_by_view = {}
+    self._recycled_rows = []
+    # Before the first layout, nothing is visible, but a
+    # FirstResponderContainerView may want to focus the first row.
+    if self._num_rows:
+      self._attach_row(0)
 
-    self.labels = [LabelView(t) for t, _ in label_control_pairs]
-    self.values = [c for _, c in label_control_pairs]
-    self.add_subviews(self.labels)
-    self.add_subviews(self.values)
+  @property
+  def num_rows(self):
+    return self._num_rows
+
+  @property
+  def focused_row(self):
+    """Index of the row containing the first responder, or ``None``"""
+    return self._focused_row
+
+  @property
+  def visible_row_range(self):
+    return range(
+      self.min_row, min(self._num_rows, self.min_row + max(0, self.inner_height + 1)))
+
+  def get_row_index(self, view):
+    """Index of the row containing ``view``, or ``None`` if it isn't in a row"""
+    return self._get_row_index_of_view(view)
+
+  def get_row_views(self, index):
+    """The ``(label_view, value_view)`` pair for row ``index`` if it has views, else ``None``"""
+    return self._rows.get(index)
 
   @property
   def min_row(self):
@@ -45,46 +141,210 @@ class ListView(RectView):
     if y < self.min_row:
       self.min_row = y
     elif y > self.min_row + self.inner_height:
-      self.min_row = max(0, min(y - self.inner_height, len(self.labels) - self.inner_height))
+      self.min_row = max(0, min(y - self.inner_height, self._num_rows - self.inner_height))
+
+  def scroll_to_row(self, index):
+    """Scroll the minimum amount that makes row ``index`` visible"""
+    self.scroll_to(index)
+
+  def insert_rows(self, index, count=1):
+    """Call after ``count`` rows are inserted into the data source at ``index``"""
+    self._num_rows = self.data_source.get_num_rows()
+    if self._min_row > index:
+      # keep the same rows on screen
+      self._min_row += count
+    self._remap_rows(lambda i: i + count if i >= index else i)
+
+  def remove_rows(self, index, count=1):
+    """Call after ``count`` rows are removed from the data source at ``index``"""
+    end = index + count
+    focus_was_removed = (
+      self._focused_row is not None and index <= self._focused_row < end)
+    self._num_rows = self.data_source.get_num_rows()
+    if self._min_row >= end:
+      self._min_row -= count
+    elif self._min_row > index:
+      self._min_row = index
+    self._min_row = max(0, min(self._min_row, self._num_rows - 1))
+    self._remap_rows(
+      lambda i: i if i < index else (None if i < end else i - count))
+    if focus_was_removed and self._num_rows:
+      self.focus_row(min(index, self._num_rows - 1))
+
+  def move_row(self, from_index, to_index):
+    """Call after the data source moves the row at ``from_index`` to ``to_index``"""
+    def remap(i):
+      if i == from_index:
+        return to_index
+      elif from_index < i <= to_index:
+        return i - 1
+      elif to_index <= i < from_index:
+        return i + 1
+      return i
+    self._remap_rows(remap)
+
+  def reload_data(self):
+    """Rebind every row after the data source changes"""
+    focused_row = self._focused_row
+    with self.batch_updates():
+      for index in list(self._rows):
+        self._detach_row(index)
+      self._num_rows = self.data_source.get_num_rows()
+      self._min_row = max(0, min(self._min_row, self._num_rows - 1))
+      if self._num_rows:
+        self._attach_row(self._min_row)
+    self.set_needs_layout()
+    if focused_row is not None and self._num_rows:
+      self.focus_row(min(focused_row, self._num_rows - 1))
+
+  def focus_row(self, index):
+    """Scroll to row ``index`` and make its control the first responder"""
+    self.scroll_to(index)
+    _, value_view = self._attach_row(index)
+    self.first_responder_container_view.set_first_responder(value_view)
 
   def set_first_responder_in_visible_area(self):
-    if self.first_responder_index and self.get_is_in_view(self.first_responder_index):
+    if self._focused_row is not None and self.get_is_in_view(self._focused_row):
       return
-    self.first_responder_container_view.set_first_responder(
-      self.values[self.min_row])
+    if self._num_rows:
+      self.focus_row(self.min_row)
+
+  ### row views ###
+
+  def _attach_row(self, index):
+    row = self._rows.get(index)
+    if row is not None:
+      return row
+    if self.data_source.recycles_rows and self._recycled_rows:
+      row = self._recycled_rows.pop()
+    else:
+      row = self.data_source.create_row(index)
+    self.data_source.bind_row(row, index)
+    self._rows[index] = row
+    for view in row:
+      self._row_index_by_view[view] = index
+    self.add_subviews(row)
+    return row
+
+  def _detach_row(self, index):
+    self._release_row(self._rows.pop(index))
+
+  def _release_row(self, row):
+    for view in row:
+      del self._row_index_by_view[view]
+    self.remove_subviews(row)
+    if self.data_source.recycles_rows:
+      self._recycled_rows.append(row)
+
+  def _remap_rows(self, remap):
+    """
+    Move existing row views to new indexes. ``remap(old_index)`` returns the
+    new index, or ``None`` if the row was removed.
+    """
+    if self._focused_row is not None:
+      self._focused_row = remap(self._focused_row)
+    old_rows = self._rows
+    self._rows = {}
+    with self.batch_updates():
+      for index, row in old_rows.items():
+        new_index = remap(index)
+        if new_index is None:
+          self._release_row(row)
+          continue
+        self._rows[new_index] = row
+        for view in row:
+          self._row_index_by_view[view] = new_index
+    self.set_needs_layout()
+
+  def _get_row_index_of_view(self, view):
+    while view is not None and view is not self:
+      index = self._row_index_by_view.get(view)
+      if index is not None:
+        return index
+      view = view.superview
+    return None
 
   def layout_subviews(self):
-    for i in range(len(self.labels)):
-      is_in_view = self.get_is_in_view(i)
+    first = self.min_row
+    last = min(self._num_rows, first + max(0, self.inner_height + 1))
+    with self.batch_updates():
+      for index in [
+          i for i in self._rows
+          if (i < first or i >= last) and i != self._focused_row]:
+        self._detach_row(index)
+      for index in range(first, last):
+        self._attach_row(index)
+      # keep rows in order so focus order matches row order
+      ordered = [view for i in sorted(self._rows) for view in self._rows[i]]
+      if ordered != self.subviews.as_list():
+        self.reorder_subviews(ordered)
+
+    label_width = self.frame.width - self.value_column_width - 2
+    for index, (label, value) in self._rows.items():
+      is_in_view = first <= index < last
       if is_in_view:
-        y = 1 + self.frame.y + i - self.min_row
-        self.labels[i].frame = Rect(
-          Point(self.frame.x + 1, y),
-          Size(self.frame.width - self.value_column_width - 2, 1))
-        self.values[i].frame = Rect(
-          Point(self.frame.x + 1 + self.frame.width - self.value_column_width - 2, y),
-          Size(self.value_column_width, 1))
-      self.labels[i].is_hidden = not is_in_view
-      self.values[i].is_hidden = not is_in_view
+        y = 1 + index - first
+        label.frame = Rect(Point(1, y), Size(label_width, 1))
+        value.frame = Rect(
+          Point(1 + label_width, y), Size(self.value_column_width, 1))
+      label.is_hidden = not is_in_view
+      value.is_hidden = not is_in_view
+
+  ### focus, input ###
+
+  def get_responder_to_focus(self, view, is_forward):
+    # Stepping focus into the list, or wrapping around inside it, would
+    # otherwise land on whichever row views happen to exist.
+    if self._get_row_index_of_view(view) is None or not self._num_rows:
+      return view
+    index = 0 if is_forward else self._num_rows - 1
+    self.scroll_to(index)
+    return self._attach_row(index)[1]
 
   def descendant_did_become_first_responder(self, control):
-    for i in range(len(self.labels)):
-      if self.values[i] == control:
-        if not self.get_is_in_view(i):
-          self.first_responder_index = i
-          self.scroll_to(i)
-        break
+    self._focused_row = self._get_row_index_of_view(control)
+    if self._focused_row is not None and not self.get_is_in_view(self._focused_row):
+      self.scroll_to(self._focused_row)
 
   def descendant_did_resign_first_responder(self, control):
-    self.first_responder_index = None
+    if self._focused_row is not None and not self.get_is_in_view(self._focused_row):
+      # it was only kept around because it had focus
+      self.set_needs_layout()
+    self._focused_row = None
+
+  def _move_focus(self, delta):
+    if self._focused_row is None:
+      return False
+    index = self._focused_row + delta
+    if 0 <= index < self._num_rows:
+      self.focus_row(index)
+      return True
+    return False
+
+  def scroll_by(self, num_rows):
+    """Scroll without moving focus"""
+    max_min_row = max(0, self._num_rows - (self.inner_height + 1))
+    self.min_row = max(0, min(max_min_row, self.min_row + num_rows))
+
+  def mouse_read(self, val, point):
+    if val == terminal.TK_MOUSE_SCROLL:
+      self.scroll_by(blt_state.mouse_wheel)
+      return True
+    return False
 
   def terminal_read(self, val):
     if val == terminal.TK_UP:
-      self.first_responder_container_view.find_prev_responder()
+      if not self._move_focus(-1):
+        self.first_responder_container_view.find_prev_responder()
       return True
     elif val == terminal.TK_DOWN:
-      self.first_responder_container_view.find_next_responder()
+      if not self._move_focus(1):
+        self.first_responder_container_view.find_next_responder()
       return True
+    elif val == terminal.TK_TAB:
+      # step through every row, not just the visible ones, before tabbing
+      # out of the list
+      return self._move_focus(-1 if blt_state.shift else 1)
     # pageup/<
     elif val == terminal.TK_PAGEUP or val == terminal.TK_COMMA and blt_state.shift:
       self.min_row = max(0, self.min_row - self.inner_height)
@@ -92,7 +352,6 @@ class ListView(RectView):
       return True
     # pagedown/>
     elif val == terminal.TK_PAGEDOWN or val == terminal.TK_PERIOD and blt_state.shift:
-      self.min_row = min(len(self.labels) - self.inner_height - 1, self.min_row + self.inner_height)
+      self.min_row = max(0, min(self._num_rows - self.inner_height - 1, self.min_row + self.inner_height))
       self.set_first_responder_in_visible_area()
       return True
-    
\ No newline at end of file
@@ -4,11 +4,24 @@ from clubsandwich.blt.nice_terminal import terminal
 from clubsandwich.blt.state import blt_state
 from .view import View
 
+__all__ = ['FirstResponderContainerView']
+
 
 class FirstResponderContainerView(View):
-  """Must be registered on the scene as terminal reader to work."""
+  """
+  Must be registered on the scene as terminal reader to work.
+
+  Keeps the descendants that can become first responder, in focus order, in a
+  list plus a view-to-index dict, so moving focus doesn't walk the tree. The
+  index is rebuilt on the next focus change after views are added or removed
+  anywhere below this one, and if the first responder is removed, focus moves
+  to the first responder in focus order. If a descendant's ``can_did_become_first_responder``
+  changes, call ``invalidate_responder_index()``.
+  """
   def __init__(self, *args, **kwargs):
     self.first_responder = None
+    self._responders = None
+    self._responder_indices = None
     super().__init__(*args, **kwargs)
     self.first_responder = None
     self.find_next_responder()
@@ -17,14 +30,12 @@ class FirstResponderContainerView(View):
   def can_did_resign_first_responder(self):
     return False
 
-  def remove_subviews(self, subviews):
-    super().remove_subviews(subviews)
-    for v in subviews:
-      for sv in v.postorder_traversal:
-        if sv == self.first_responder:
-          self.set_first_responder(None)
-          self.find_next_responder()
-          return
+  def descendant_subviews_did_change(self):
+    self.invalidate_responder_index()
+    responder = self.first_responder
+    if responder and responder is not self and self not in responder.ancestors:
+      self.set_first_responder(None)
+      self.find_next_responder()
 
   def set_first_responder(self, new_value):
     if self.first_responder:
@@ -37,35 +48,53 @@ class FirstResponderContainerView(View):
       for ancestor in self.first_responder.ancestors:
         ancestor.descendant_did_become_first_responder(self.first_responder)
 
+  def invalidate_responder_index(self):
+    # Splicing each added or removed subtree into the list wouldn't be
+    # cheaper: the indices after it would still need renumbering, which is
+    # O(n) per change. Rebuilding lazily is O(n) once for any number of
+    # changes between focus moves, e.g. a ListView adding all of its rows.
+    self._responders = None
+    self._responder_indices = None
+
+  def _get_responders(self):
+    if self._responders is None:
+      self._responders = [
+        v for v in self.postorder_traversal if v.can_did_become_first_responder]
+      self._responder_indices = {v: i for i, v in enumerate(self._responders)}
+    return self._responders
+
+  def _get_responder_to_focus(self, view, is_forward):
+    for ancestor in list(view.ancestors):
+      if ancestor is self:
+        break
+      view = ancestor.get_responder_to_focus(view, is_forward)
+    return view
+
   def find_next_responder(self):
     existing_responder = self.first_responder or self.leftmost_leaf
-    all_responders = [v for v in self.postorder_traversal if v.can_did_become_first_responder]
-    try:
-      i = all_responders.index(existing_responder)
-      if i == len(all_responders) - 1:
-        self.set_first_responder(all_responders[0])
-      else:
-        self.set_first_responder(all_responders[i + 1])
-    except ValueError:
-      if all_responders:
-        self.set_first_responder(all_responders[0])
-      else:
-        self.set_first_responder(None)
+    all_responders = self._get_responders()
+    i = self._responder_indices.get(existing_responder)
+    if i is not None:
+      self.set_first_responder(self._get_responder_to_focus(
+        all_responders[(i + 1) % len(all_responders)], True))
+    elif all_responders:
+      self.set_first_responder(
+        self._get_responder_to_focus(all_responders[0], True))
+    else:
+      self.set_first_responder(None)
 
   def find_prev_responder(self):
     existing_responder = self.first_responder or self.leftmost_leaf
-    all_responders = [v for v in self.postorder_traversal if v.can_did_become_first_responder]
-    try:
-      i = all_responders.index(existing_responder)
-      if i == 0:
-        self.set_first_responder(all_responders[-1])
-      else:
-        self.set_first_responder(all_responders[i - 1])
-    except ValueError:
-      if all_responders:
-        self.set_first_responder(all_responders[-1])
-      else:
-        self.set_first_responder(None)
+    all_responders = self._get_responders()
+    i = self._responder_indices.get(existing_responder)
+    if i is not None:
+      self.set_first_responder(
+        self._get_responder_to_focus(all_responders[i - 1], False))
+    elif all_responders:
+      self.set_first_responder(
+        self._get_responder_to_focus(all_responders[-1], False))
+    else:
+      self.set_first_responder(None)
 
   def terminal_read(self, val):
     handled = self.first_responder and self.first_responder.terminal_read(val)
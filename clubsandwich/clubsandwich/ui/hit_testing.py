@@ -0,0 +1,101 @@
+"""
+Finding which view is under the mouse.
+
+``UIScene`` keeps a ``SpatialGrid`` of every view's frame in terminal
+coordinates. Views mark themselves as needing an update when their frame
+changes or they are added to the tree, and ``View.update_hit_index()`` only
+visits those parts of the tree, so keeping the grid current costs about as
+much as the layout that caused the change.
+"""
+
+__all__ = ['SpatialGrid', 'hit_test']
+
+
+class SpatialGrid:
+  """
+  Maps objects to rects, bucketed into a uniform grid of
+  ``bucket_size``-by-``bucket_size`` cells so that finding the objects at a
+  point only looks at one bucket.
+  """
+
+  def __init__(self, bucket_size=8):
+    super().__init__()
+    self.bucket_size = bucket_size
+    self._buckets = {}  # (bx, by) -> {key: None}
+    self._entries = {}  # key -> (rect, value)
+
+  def __len__(self):
+    return len(self._entries)
+
+  def __contains__(self, key):
+    return key in self._entries
+
+  def _get_bucket_keys(self, rect):
+    size = self.bucket_size
+    for by in range(rect.origin.y // size, rect.y2 // size + 1):
+      for bx in range(rect.origin.x // size, rect.x2 // size + 1):
+        yield (bx, by)
+
+  def update(self, key, rect, value=None):
+    """Set the rect (and an arbitrary ``value``) stored for ``key``"""
+    old_entry = self._entries.get(key)
+    if old_entry is not None and old_entry[0] == rect:
+      self._entries[key] = (rect, value)
+      return
+    self.remove(key)
+    if rect.is_empty:
+      return
+    self._entries[key] = (rect, value)
+    for bucket_key in self._get_bucket_keys(rect):
+      self._buckets.setdefault(bucket_key, {})[key] = None
+
+  def remove(self, key):
+    entry = self._entries.pop(key, None)
+    if entry is None:
+      return
+    for bucket_key in self._get_bucket_keys(entry[0]):
+      bucket = self._buckets[bucket_key]
+      del bucket[key]
+      if not bucket:
+        del self._buckets[bucket_key]
+
+  def get_rect(self, key):
+    return self._entries[key][0]
+
+  def query_point(self, point):
+    """Returns ``(key, rect, value)`` for every rect containing ``point``"""
+    size = self.bucket_size
+    bucket = self._buckets.get((point.x // size, point.y // size))
+    if not bucket:
+      return []
+    results = []
+    for key in bucket:
+      rect, value = self._entries[key]
+      if rect.contains(point):
+        results.append((key, rect, value))
+    return results
+
+
+def hit_test(grid, point):
+  """
+  Returns the deepest visible view in ``grid`` containing ``point``, or
+  ``None``. Grid values must be view depths, as stored by
+  ``View.update_hit_index()``.
+  """
+  best_view = None
+  best_depth = -1
+  for view, _, depth in grid.query_point(point):
+    if depth > best_depth and not _is_hidden_in_tree(view):
+      best_view = view
+      best_depth = depth
+  return best_view
+
+
+def _is_hidden_in_tree(view):
+  if view.is_hidden:
+    return True
+  for ancestor in view.ancestors:
+    if ancestor.is_hidden:
+      return True
+  return False
+
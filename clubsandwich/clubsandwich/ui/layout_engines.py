@@ -0,0 +1,215 @@
+"""
+Layout engines decide where a view's subviews go. Assign one to
+``View.layout_engine``; ``View.layout_subviews()`` delegates to it.
+
+* ``SpringsAndStrutsLayout`` (the default) places each subview independently
+  using its ``layout_options``.
+* ``StackLayout`` and ``GridLayout`` place all subviews in one batch by solving
+  for lengths along an axis with ``distribute()``. A solution is cached and
+  reused until the container size or a subview's constraints change.
+"""
+from functools import lru_cache
+from math import ceil, floor
+
+from clubsandwich.geom import Point, Rect, Size
+from .layout_options import _compile_axis
+
+__all__ = [
+  'apply_springs_and_struts_layout_to_view', 'distribute', 'LayoutEngine',
+  'SpringsAndStrutsLayout', 'SPRINGS_AND_STRUTS', 'StackLayout', 'GridLayout',
+]
+
+
+def apply_springs_and_struts_layout_to_view(view):
+  if view._layout_function is None:
+    view._layout_function = view.layout_options.get_layout_function()
+  view.frame = view._layout_function(view)
+
+
+def distribute(available, items, spacing=0):
+  """
+  Solve a row of items along one axis.
+
+  Each item is ``(before, length, after, weight)``: fixed margins before and
+  after it, a fixed length or ``None``, and a weight used if the length is
+  ``None``. Space left over after fixed lengths, margins, and ``spacing``
+  between items is split between flexible items in proportion to their
+  weights, rounding so that all of it is used.
+
+  Returns a list of integer ``(start, length)`` pairs.
+  """
+  fixed_total = spacing * max(0, len(items) - 1)
+  remaining_weight = 0
+  for before, length, after, weight in items:
+    fixed_total += before + after
+    if length is None:
+      remaining_weight += weight
+    else:
+      fixed_total += length
+  remaining = max(0, available - fixed_total)
+
+  results = []
+  position = 0
+  for before, length, after, weight in items:
+    position += before
+    if length is None:
+      if remaining_weight > 0:
+        length = floor(remaining * weight / remaining_weight)
+        remaining -= length
+        remaining_weight -= weight
+      else:
+        length = 0
+    results.append((floor(position), floor(length)))
+    position += length + after + spacing
+  return results
+
+
+class LayoutEngine:
+  """
+  Subclass and implement ``layout_subviews()``. Engines that cache results
+  should not be shared between views.
+  """
+
+  def layout_subviews(self, view):
+    raise NotImplementedError()
+
+
+class SpringsAndStrutsLayout(LayoutEngine):
+  """Lays out each subview using its ``layout_options`` and ``layout_spec``"""
+
+  def layout_subviews(self, view):
+    for subview in view.subviews:
+      apply_springs_and_struts_layout_to_view(subview)
+
+
+SPRINGS_AND_STRUTS = SpringsAndStrutsLayout()
+
+
+_AXIS_FIELDS = [('left', 'width', 'right'), ('top', 'height', 'bottom')]
+
+
+@lru_cache(maxsize=1024)
+def _get_axis_function(options, axis):
+  return _compile_axis(options, *_AXIS_FIELDS[axis], axis)
+
+
+def _get_margin(options, k, available):
+  value_type = options.get_type(k)
+  if value_type == 'constant':
+    return getattr(options, k)
+  elif value_type == 'fraction':
+    return getattr(options, k) * available
+  else:
+    return 0
+
+
+def _get_length(view, options, k, axis, available):
+  value_type = options.get_type(k)
+  if value_type == 'none':
+    return None
+  elif value_type == 'constant':
+    return getattr(options, k)
+  elif value_type == 'fraction':
+    return getattr(options, k) * available
+  elif value_type == 'intrinsic':
+    return view.intrinsic_size[axis]
+  else:  # 'frame'
+    return view.layout_spec.size[axis]
+
+
+class StackLayout(LayoutEngine):
+  """
+  Places subviews one after another, top to bottom (``axis='vertical'``) or
+  left to right (``axis='horizontal'``).
+
+  Along the stacking axis, each subview's ``layout_options`` size field
+  (``height`` or ``width``) may be a constant, fraction, ``'intrinsic'``, or
+  ``'frame'``; if it is ``None``, the subview gets an equal share of the
+  leftover space. The start/end fields (e.g. ``top``/``bottom``) are margins.
+  Across the stacking axis, normal springs-and-struts rules apply.
+  """
+
+  def __init__(self, axis='vertical', spacing=0):
+    super().__init__()
+    if axis not in ('vertical', 'horizontal'):
+      raise ValueError("axis must be 'vertical' or 'horizontal'")
+    self.axis = axis
+    self.spacing = spacing
+    self._last_key = None
+    self._last_frames = None
+
+  def layout_subviews(self, view):
+    main_axis = 1 if self.axis == 'vertical' else 0
+    cross_axis = 1 - main_axis
+    main_fields = _AXIS_FIELDS[main_axis]
+    available = view.bounds.size[main_axis]
+    cross_available = view.bounds.size[cross_axis]
+
+    items = []
+    crosses = []
+    for subview in view.subviews:
+      options = subview.layout_options
+      items.append((
+        _get_margin(options, main_fields[0], available),
+        _get_length(subview, options, main_fields[1], main_axis, available),
+        _get_margin(options, main_fields[2], available),
+        1))
+      crosses.append(
+        _get_axis_function(options, cross_axis)(subview, cross_available))
+
+    key = (available, cross_available, self.spacing, tuple(items), tuple(crosses))
+    if key != self._last_key:
+      frames = []
+      for (start, length), (cross_start, cross_length) in zip(
+          distribute(available, items, self.spacing), crosses):
+        if main_axis == 1:
+          frames.append(Rect(
+            Point(floor(cross_start), start), Size(floor(cross_length), length)))
+        else:
+          frames.append(Rect(
+            Point(start, floor(cross_start)), Size(length, floor(cross_length))))
+      self._last_key = key
+      self._last_frames = frames
+
+    for subview, frame in zip(view.subviews, self._last_frames):
+      subview.frame = frame
+
+
+class GridLayout(LayoutEngine):
+  """
+  Places subviews in a grid, row by row, in ``columns`` equal-width columns.
+  Rows are ``row_height`` tall, or share the container's height equally if
+  ``row_height`` is ``None``. Subviews' ``layout_options`` are ignored.
+  """
+
+  def __init__(self, columns, row_height=None, column_spacing=0, row_spacing=0):
+    super().__init__()
+    if columns < 1:
+      raise ValueError("columns must be at least 1")
+    self.columns = columns
+    self.row_height = row_height
+    self.column_spacing = column_spacing
+    self.row_spacing = row_spacing
+    self._last_key = None
+    self._last_frames = None
+
+  def layout_subviews(self, view):
+    size = view.bounds.size
+    num_rows = ceil(len(view.subviews) / self.columns)
+    key = (
+      size, len(view.subviews), self.columns, self.row_height,
+      self.column_spacing, self.row_spacing)
+    if key != self._last_key:
+      columns = distribute(
+        size.width, [(0, None, 0, 1)] * self.columns, self.column_spacing)
+      rows = distribute(
+        size.height, [(0, self.row_height, 0, 1)] * num_rows, self.row_spacing)
+      self._last_frames = [
+        Rect(Point(x, y), Size(width, height))
+        for y, height in rows
+        for x, width in columns
+      ]
+      self._last_key = key
+
+    for subview, frame in zip(view.subviews, self._last_frames):
+      subview.frame = frame
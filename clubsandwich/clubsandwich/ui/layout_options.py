@@ -1,6 +1,12 @@
 from collections import namedtuple
+from functools import lru_cache
+from math import floor
 from numbers import Real
 
+from clubsandwich.geom import Point, Rect, Size
+
+__all__ = ['LayoutOptions']
+
 
 _LayoutOptions = namedtuple(
   '_LayoutOptions',
@@ -67,6 +73,14 @@ class LayoutOptions(_LayoutOptions):
 
   ### Semi-internal layout API ###
 
+  def get_layout_function(self):
+    """
+    Returns a function ``f(view) -> Rect`` that computes ``view.frame`` from
+    these options, ``view.layout_spec``, and ``view.superview.bounds``. The
+    function is built once per distinct set of options and reused.
+    """
+    return _compile_springs_and_struts(self)
+
   def get_type(self, k):
     """Return one of ``{'none', 'frame', 'constant', 'fraction'}``"""
     val = getattr(self, k)
@@ -91,37 +105,101 @@ class LayoutOptions(_LayoutOptions):
     return ','.join(["{}={}".format(k, self.get_type(k)) for k in keys])
 
   def get_value(self, k, view):
+    """Returns the current value of option ``k`` for ``view``"""
     if getattr(self, k) is None:
       raise ValueError("Superview isn't relevant to this value")
-    elif self.get_type(k) == 'constant':
-      return getattr(self, k)
-    elif self.get_type(k) == 'intrinsic':
-      if k == 'width':
-        return view.intrinsic_size.width
-      elif k == 'height':
-        return view.intrinsic_size.height
-      else:
-        raise KeyError("'intrinsic' can only be used with width or height.")
-    elif self.get_type(k) == 'frame':
-      if k == 'left':
-        return view.layout_spec.x
-      elif k == 'top':
-        return view.layout_spec.y
-      elif k == 'right':
-        return superview.bounds.width - view.layout_spec.x2
-      elif k == 'bottom':
-        return superview.bounds.height - view.layout_spec.y2
-      elif k == 'width':
-        return view.layout_spec.width
-      elif k == 'height':
-        return view.layout_spec.height
-      else:
-        raise KeyError("Unknown key:", k)
-    elif self.get_type(k) == 'fraction':
-      val = getattr(self, k)
-      if k in ('left', 'width', 'right'):
-        return view.superview.bounds.width * val
-      elif k in ('top', 'height', 'bottom'):
-        return view.superview.bounds.height * val
-      else:
-        raise KeyError("Unknown key:", k)
\ No newline at end of file
+    axis = 0 if k in ('left', 'width', 'right') else 1
+    get_value = _compile_value(self, k, axis)
+    return get_value(view, view.superview.bounds.size[axis])
+
+
+### Springs and struts compiler ###
+
+_AXES = [
+  # start, size, end, axis index into Point/Size
+  ('left', 'width', 'right', 0),
+  ('top', 'height', 'bottom', 1),
+]
+
+
+def _compile_value(options, k, axis):
+  """Returns ``f(view, superview_length) -> number`` for a defined field"""
+  val = getattr(options, k)
+  value_type = options.get_type(k)
+  if value_type == 'constant':
+    return lambda view, superview_length: val
+  elif value_type == 'fraction':
+    return lambda view, superview_length: superview_length * val
+  elif value_type == 'intrinsic':
+    if k not in ('width', 'height'):
+      raise KeyError("'intrinsic' can only be used with width or height.")
+    return lambda view, superview_length: view.intrinsic_size[axis]
+  elif value_type == 'frame':
+    if k in ('left', 'top'):
+      return lambda view, superview_length: view.layout_spec.origin[axis]
+    elif k in ('width', 'height'):
+      return lambda view, superview_length: view.layout_spec.size[axis]
+    else:
+      # distance from the far edge of the spec to the far edge of the superview
+      return lambda view, superview_length: (
+        superview_length -
+        (view.layout_spec.origin[axis] + view.layout_spec.size[axis]))
+  else:
+    raise KeyError("Unknown key:", k)
+
+
+def _compile_axis(options, field_start, field_size, field_end, axis):
+  """Returns ``f(view, superview_length) -> (coord, size)``"""
+  matches = (
+    options.get_is_defined(field_start),
+    options.get_is_defined(field_size),
+    options.get_is_defined(field_end))
+
+  if matches == (True, False, False):
+    get_start = _compile_value(options, field_start, axis)
+    # pretend that size is constant from frame
+    return lambda view, sl: (get_start(view, sl), view.layout_spec.size[axis])
+  elif matches == (True, True, False):
+    get_start = _compile_value(options, field_start, axis)
+    get_size = _compile_value(options, field_size, axis)
+    return lambda view, sl: (get_start(view, sl), get_size(view, sl))
+  elif matches == (False, True, False):  # magical centering!
+    get_size = _compile_value(options, field_size, axis)
+    def centered(view, sl):
+      size_val = get_size(view, sl)
+      return (sl / 2 - size_val / 2, size_val)
+    return centered
+  elif matches == (False, True, True):
+    get_size = _compile_value(options, field_size, axis)
+    get_end = _compile_value(options, field_end, axis)
+    def end_and_size(view, sl):
+      size_val = get_size(view, sl)
+      return (sl - get_end(view, sl) - size_val, size_val)
+    return end_and_size
+  elif matches == (False, False, True):
+    get_end = _compile_value(options, field_end, axis)
+    # pretend that size is constant from frame
+    return lambda view, sl: (sl - get_end(view, sl), view.layout_spec.size[axis])
+  elif matches == (True, False, True):
+    get_start = _compile_value(options, field_start, axis)
+    get_end = _compile_value(options, field_end, axis)
+    def start_and_end(view, sl):
+      start_val = get_start(view, sl)
+      return (start_val, sl - start_val - get_end(view, sl))
+    return start_and_end
+  else:
+    raise ValueError("Invalid spring/strut definition: {}".format(
+      options.get_debug_string_for_keys([field_start, field_size, field_end])))
+
+
+@lru_cache(maxsize=1024)
+def _compile_springs_and_struts(options):
+  get_x = _compile_axis(options, *_AXES[0])
+  get_y = _compile_axis(options, *_AXES[1])
+
+  def layout(view):
+    superview_size = view.superview.bounds.size
+    x, width = get_x(view, superview_size[0])
+    y, height = get_y(view, superview_size[1])
+    return Rect(Point(floor(x), floor(y)), Size(floor(width), floor(height)))
+  return layout
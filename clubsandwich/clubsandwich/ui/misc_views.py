@@ -1,16 +1,32 @@
 from .view import View
 from contextlib import contextmanager
+from functools import lru_cache
 from math import floor
 
 from clubsandwich.blt.nice_terminal import terminal
 from clubsandwich.blt.state import blt_state
 from clubsandwich.geom import Point, Rect, Size
 from .view import View
+from .layout_engines import GridLayout, StackLayout
 from .layout_options import LayoutOptions
 
+__all__ = [
+  'temporary_color', 'measure_text', 'RectView', 'WindowView', 'LabelView',
+  'StackView', 'GridView', 'ButtonView',
+]
+
 
 @contextmanager
-def temporary_color(fg, bg):
+def temporary_color(fg, bg, ctx=None):
+  """
+  Draw with ``fg``/``bg`` (either may be ``None``) inside the block. If
+  ``ctx`` is a ``BearLibTerminalContext``, its color stack is used; otherwise
+  the terminal's colors are set directly and restored afterwards.
+  """
+  if ctx is not None:
+    with ctx.temporary_color(fg, bg):
+      yield
+    return
   old_fg = blt_state.color
   old_bg = blt_state.bkcolor
   if fg:
@@ -22,27 +38,36 @@ def temporary_color(fg, bg):
   terminal.bkcolor(old_bg)
 
 
+@lru_cache(maxsize=1024)
+def measure_text(text):
+  """
+  Returns the ``Size`` of ``text`` in cells. Results are shared by every
+  caller, so labels with identical text only measure it once.
+  """
+  height = 0
+  width = 0
+  for line in text.splitlines():
+    height += 1
+    width = max(width, len(line))
+  return Size(width, height)
+
+
 class RectView(View):
-  def __init__(self, color_fg='#aaaaaa', color_bg='#000000', *args, **kwargs):
+  """
+  Draws a filled box with a border. ``box_style`` is a key of
+  ``clubsandwich.blt.box_drawing.BOX_STYLES`` or a ``BoxGlyphs``.
+  """
+  def __init__(
+      self, color_fg='#aaaaaa', color_bg='#000000', *args, box_style='single',
+      **kwargs):
     super().__init__(*args, **kwargs)
     self.color_fg = color_fg
     self.color_bg = color_bg
+    self.box_style = box_style
 
   def draw(self, ctx):
-    with temporary_color(self.color_fg, self.color_bg):
-      ctx.clear_area(self.bounds)
-      for point in self.bounds.points_top:
-        ctx.put(point, '─')
-      for point in self.bounds.points_bottom:
-        ctx.put(point, '─')
-      for point in self.bounds.points_left:
-        ctx.put(point, '│')
-      for point in self.bounds.points_right:
-        ctx.put(point, '│')
-      ctx.put(self.bounds.origin, '┌')
-      ctx.put(self.bounds.point_top_right, '┐')
-      ctx.put(self.bounds.point_bottom_left, '└')
-      ctx.put(self.bounds.point_bottom_right, '┘')
+    with ctx.temporary_color(self.color_fg, self.color_bg):
+      ctx.draw_box(self.bounds, style=self.box_style)
 
 
 class WindowView(RectView):
@@ -58,27 +83,65 @@ class WindowView(RectView):
 class LabelView(View):
   def __init__(self, text, color_fg='#ffffff', color_bg=None, *args, **kwargs):
     super().__init__(*args, **kwargs)
-    self.text = text
+    self._text = text
+    self._intrinsic_size = None
+    self._text_origin = None
     self.color_fg = color_fg
     self.color_bg = color_bg
 
+  @property
+  def text(self):
+    return self._text
+
+  @text.setter
+  def text(self, new_value):
+    if new_value == self._text:
+      return
+    self._text = new_value
+    self._intrinsic_size = None
+    self._text_origin = None
+    self.set_needs_display()
+    self.invalidate_intrinsic_size()
+
   @property
   def intrinsic_size(self):
-    height = 0
-    width = 0
-    for line in self.text.splitlines():
-      height += 1
-      width = max(width, len(line))
-    return Size(width, height)
+    if self._intrinsic_size is None:
+      self._intrinsic_size = measure_text(self._text)
+    return self._intrinsic_size
 
   def draw(self, ctx):
-    with temporary_color(self.color_fg, self.color_bg):
-      ctx.print((self.bounds.size / 2 - self.intrinsic_size / 2).floored, self.text)
+    # cache the centered text position until text or size changes
+    size = self.bounds.size
+    if self._text_origin is None or self._text_origin[0] != size:
+      self._text_origin = (
+        size, (size / 2 - self.intrinsic_size / 2).floored)
+    with ctx.temporary_color(self.color_fg, self.color_bg):
+      ctx.print(self._text_origin[1], self._text)
 
   def debug_string(self):
     return super().debug_string() + ' ' + repr(self.text)
 
 
+class StackView(View):
+  """
+  Stacks its subviews vertically or horizontally. See ``StackLayout`` for how
+  subviews' ``layout_options`` are interpreted.
+  """
+  def __init__(self, *args, axis='vertical', spacing=0, **kwargs):
+    super().__init__(
+      *args, layout_engine=StackLayout(axis=axis, spacing=spacing), **kwargs)
+
+
+class GridView(View):
+  """Arranges its subviews in a grid. See ``GridLayout``."""
+  def __init__(
+      self, *args, columns=1, row_height=None, column_spacing=0, row_spacing=0,
+      **kwargs):
+    super().__init__(*args, layout_engine=GridLayout(
+      columns, row_height=row_height, column_spacing=column_spacing,
+      row_spacing=row_spacing), **kwargs)
+
+
 class ButtonView(View):
   def __init__(self, text, callback, *args, **kwargs):
     self.label_view = LabelView(text, *args, **kwargs)
@@ -92,10 +155,12 @@ class ButtonView(View):
   def did_become_first_responder(self):
       self.label_view.color_fg = '#000000'
       self.label_view.color_bg = '#ffffff'
+      self.label_view.set_needs_display()
 
   def did_resign_first_responder(self):
       self.label_view.color_fg = '#ffffff'
       self.label_view.color_bg = '#000000'
+      self.label_view.set_needs_display()
 
   @property
   def text(self):
@@ -104,6 +169,7 @@ class ButtonView(View):
   @text.setter
   def text(self, new_value):
     self.label_view.text = new_value
+    self.invalidate_intrinsic_size()
 
   @property
   def intrinsic_size(self):
@@ -120,4 +186,12 @@ class ButtonView(View):
   def terminal_read(self, val):
     if val == terminal.TK_ENTER:
       self.callback()
+      return True
+
+  def mouse_read(self, val, point):
+    if val == terminal.TK_MOUSE_LEFT:
+      container = self.first_responder_container_view
+      if container:
+        container.set_first_responder(self)
+      self.callback()
       return True
\ No newline at end of file
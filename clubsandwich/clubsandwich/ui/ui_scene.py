@@ -0,0 +1,80 @@
+from clubsandwich.blt.nice_terminal import terminal
+from clubsandwich.blt.state import blt_state
+from clubsandwich.director import Scene
+from clubsandwich.geom import Point, Size
+from .firstrespondercontainerview import FirstResponderContainerView
+from .hit_testing import SpatialGrid
+
+__all__ = ['UIScene']
+
+
+def _is_mouse_event(val):
+  val &= ~terminal.TK_KEY_RELEASED
+  return terminal.TK_MOUSE_LEFT <= val <= terminal.TK_MOUSE_SCROLL
+
+
+class UIScene(Scene):
+  """
+  A scene containing a tree of views. The root view is always the size of the
+  terminal, and is only redrawn where its ``dirty_rect`` says something
+  changed.
+
+  Mouse events go to the deepest visible view under the cursor via
+  ``View.mouse_read()``, bubbling up to its ancestors until one handles it.
+  Unhandled mouse events, and all other events, go to the first responder.
+
+  Views whose ``layer`` is set draw on that layer instead of the scene's.
+  """
+  def __init__(self, views, *args, **kwargs):
+    super().__init__(*args, **kwargs)
+
+    if not isinstance(views, list):
+      views = [views]
+
+    self.view = FirstResponderContainerView(subviews=views, scene=self)
+    self.view.hit_index = SpatialGrid()
+    self.add_terminal_reader(self.view)
+
+  def terminal_read(self, val):
+    if _is_mouse_event(val) and self.mouse_read(val):
+      return True
+    super().terminal_read(val)
+    if val == terminal.TK_BACKSLASH:
+      self.view.debug_print()
+
+  def terminal_layout(self):
+    size = Size(blt_state.width, blt_state.height)
+    if size != self.view.frame.size:
+      self.view.frame = self.view.frame.with_size(size)
+    self.view.perform_layout()
+    self.view.update_hit_index()
+
+  def mouse_read(self, val):
+    point = Point(blt_state.mouse_x, blt_state.mouse_y)
+    view = self.view.hit_test(point)
+    if view is None:
+      return False
+    point = point - self.view.hit_index.get_rect(view).origin
+    while view:
+      if view.mouse_read(val, point):
+        return True
+      point = point + view.frame.origin
+      view = view.superview
+    return False
+
+  @property
+  def layers(self):
+    if not self.view.used_layers:
+      return (self.layer,)
+    return tuple(sorted(self.view.used_layers | {self.layer}))
+
+  @property
+  def needs_display(self):
+    return self.view.dirty_rect is not None
+
+  @property
+  def dirty_rect(self):
+    return self.view.dirty_rect
+
+  def terminal_update(self, is_active=False):
+    self.view.perform_draw(self.director().ctx)
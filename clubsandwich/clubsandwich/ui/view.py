@@ -1,17 +1,78 @@
 import weakref
 from collections import namedtuple
+from contextlib import contextmanager
 from numbers import Real
 
 from clubsandwich.geom import Point, Rect, Size
 from clubsandwich.blt.context import BearLibTerminalContext
+from .layout_engines import SPRINGS_AND_STRUTS
 from .layout_options import LayoutOptions
+from .hit_testing import hit_test
+
+__all__ = ['ZERO_RECT', 'SubviewList', 'View']
 
 
 ZERO_RECT = Rect(Point(0, 0), Size(0, 0)) 
 
 
+class SubviewList:
+  """
+  The subviews of a ``View``, in order. Reads like a list, but is backed by a
+  dict, so ``in``, appending, and removing a view are O(1). Indexing other
+  than ``[0]`` copies the views into a list, which is kept until the next
+  change.
+  """
+  __slots__ = ('_views', '_list')
+
+  def __init__(self, views=()):
+    self._views = dict.fromkeys(views)
+    self._list = None
+
+  def __len__(self):
+    return len(self._views)
+
+  def __iter__(self):
+    return iter(self._views)
+
+  def __reversed__(self):
+    return reversed(self.as_list())
+
+  def __contains__(self, view):
+    return view in self._views
+
+  def __getitem__(self, i):
+    if i == 0 and self._views:
+      return next(iter(self._views))
+    return self.as_list()[i]
+
+  def __repr__(self):
+    return 'SubviewList({!r})'.format(self.as_list())
+
+  def as_list(self):
+    if self._list is None:
+      self._list = list(self._views)
+    return self._list
+
+  def index(self, view):
+    return self.as_list().index(view)
+
+  def append(self, view):
+    self._views[view] = None
+    self._list = None
+
+  def extend(self, views):
+    self._views.update(dict.fromkeys(views))
+    self._list = None
+
+  def remove(self, view):
+    del self._views[view]
+    self._list = None
+
+
 class View:
-  def __init__(self, frame=None, subviews=None, scene=None, layout_options=None):
+  def __init__(
+      self, frame=None, subviews=None, scene=None, layout_options=None,
+      layout_engine=None):
     if isinstance(layout_options, dict):  # have pity on the user's imports
       opts = LayoutOptions()._asdict()
       opts.update(layout_options)
@@ -19,15 +80,31 @@ class View:
     self._scene = scene
     self._superview_weakref = lambda: None
     self.needs_layout = True
+    self.descendant_needs_layout = False
+    self.needs_hit_index_update = True
+    self.descendant_needs_hit_index_update = False
+    # set on a root view to enable hit_test(); see update_hit_index()
+    self.hit_index = None
+    self._dirty_rect = None
+    self._is_hidden = False
+    self._layer = None
+    # every layer set on this view or a descendant; never shrinks, so that
+    # layers a view has stopped using still get cleared
+    self.used_layers = frozenset()
     self._frame = frame or ZERO_RECT
     self._bounds = self.frame.with_origin(Point(0, 0))
-    self.subviews = []
+    self._batch_depth = 0
+    self._batch_dirty_rect = None
+    self._batch_needs_layout = False
+    self._batch_subviews_did_change = False
+    self.subviews = SubviewList()
     self.add_subviews(subviews or [])
     self.is_first_responder = False
-    self.is_hidden = False
 
     self.layout_spec = frame
+    self._layout_function = None
     self.layout_options = layout_options or LayoutOptions()
+    self.layout_engine = layout_engine or SPRINGS_AND_STRUTS
 
   ### core api ###
 
@@ -50,48 +127,298 @@ class View:
       self._superview_weakref = lambda: None
 
   def set_needs_layout(self, val=True):
+    """
+    Mark this view as needing ``layout_subviews()`` on the next
+    ``perform_layout()``. Ancestors are flagged with
+    ``descendant_needs_layout`` so that clean subtrees can be skipped.
+    """
     self.needs_layout = val
+    if not val:
+      return
+    ancestor = self.superview
+    while ancestor and not ancestor.descendant_needs_layout:
+      ancestor.descendant_needs_layout = True
+      ancestor = ancestor.superview
+
+  def set_needs_hit_index_update(self):
+    """
+    Mark this view's absolute frame (and its descendants') as stale in the
+    root's ``hit_index``
+    """
+    self.needs_hit_index_update = True
+    ancestor = self.superview
+    while ancestor and not ancestor.descendant_needs_hit_index_update:
+      ancestor.descendant_needs_hit_index_update = True
+      ancestor = ancestor.superview
+
+  def invalidate_intrinsic_size(self):
+    """
+    Call when ``intrinsic_size`` changes so the superview lays this view out
+    again.
+    """
+    if self.superview:
+      self.superview.set_needs_layout(True)
+
+  def set_needs_display(self, rect=None):
+    """
+    Mark ``rect`` (relative to ``self.bounds``, defaulting to all of it) as
+    needing to be redrawn. The area is accumulated on the root view of the
+    tree as ``dirty_rect``.
+    """
+    rect = rect or self.bounds
+    view = self
+    while view.superview:
+      rect = rect.moved_by(view.frame.origin)
+      view = view.superview
+    if view._dirty_rect is None:
+      view._dirty_rect = rect
+    else:
+      view._dirty_rect = view._dirty_rect.union(rect)
+
+  @property
+  def dirty_rect(self):
+    """
+    On the root view, the area that needs to be redrawn, or ``None`` if
+    nothing has changed since the last ``perform_draw()``.
+    """
+    return self._dirty_rect
+
+  @property
+  def is_hidden(self):
+    return self._is_hidden
+
+  @is_hidden.setter
+  def is_hidden(self, new_value):
+    if new_value == self._is_hidden:
+      return
+    self._is_hidden = new_value
+    if self.superview:
+      self.superview.set_needs_display(self.frame)
+
+  @property
+  def layer(self):
+    """
+    The terminal layer this view and its subviews draw on, or ``None`` to use
+    the superview's (or the scene's)
+    """
+    return self._layer
+
+  @layer.setter
+  def layer(self, new_value):
+    if new_value == self._layer:
+      return
+    self._layer = new_value
+    if new_value is not None:
+      self._add_used_layers(frozenset([new_value]))
+    self.set_needs_display()
+
+  def _add_used_layers(self, layers):
+    view = self
+    while view is not None and not layers <= view.used_layers:
+      view.used_layers = view.used_layers | layers
+      view = view.superview
 
   def add_subviews(self, subviews):
+    subviews = list(subviews)
     for v in subviews:
       v.superview = self
+      v.set_needs_hit_index_update()
+      if v.used_layers:
+        self._add_used_layers(v.used_layers)
     self.subviews.extend(subviews)
+    self._subviews_did_change(subviews)
 
   def remove_subviews(self, subviews):
+    # copy first, since this is often called with self.subviews. Views that
+    # aren't subviews of this one are ignored.
+    subviews = [v for v in dict.fromkeys(subviews) if v in self.subviews]
+    if not subviews:
+      return
+    root = self
+    while root.superview:
+      root = root.superview
     for v in subviews:
+      if root.hit_index is not None:
+        for descendant in v.postorder_traversal:
+          root.hit_index.remove(descendant)
       v.superview = None
-    self.subviews = [v for v in self.subviews if v not in subviews]
+      self.subviews.remove(v)
+    self._subviews_did_change(subviews)
+
+  def reorder_subviews(self, subviews):
+    """Put the subviews in the order given. ``subviews`` must contain exactly the current subviews."""
+    self.subviews = SubviewList(subviews)
+    self._notify_subviews_did_change()
+
+  @contextmanager
+  def batch_updates(self):
+    """
+    Within this block, ``add_subviews()`` and ``remove_subviews()`` on this
+    view only record what changed. Redrawing, relayout, and
+    ``descendant_subviews_did_change()`` notifications for this view and its
+    ancestors (including for changes further down the tree) happen once, when
+    the outermost ``batch_updates()`` block on this view ends.
+    """
+    self._batch_depth += 1
+    try:
+      yield
+    finally:
+      self._batch_depth -= 1
+      if self._batch_depth == 0:
+        self._end_batch_updates()
+
+  def _end_batch_updates(self):
+    dirty_rect = self._batch_dirty_rect
+    needs_layout = self._batch_needs_layout
+    subviews_did_change = self._batch_subviews_did_change
+    self._batch_dirty_rect = None
+    self._batch_needs_layout = False
+    self._batch_subviews_did_change = False
+    if dirty_rect is not None:
+      self.set_needs_display(dirty_rect)
+    if needs_layout:
+      self.set_needs_layout(True)
+    if subviews_did_change:
+      self._notify_subviews_did_change()
+
+  def _subviews_did_change(self, changed_subviews):
+    dirty_rect = self._batch_dirty_rect
+    for v in changed_subviews:
+      dirty_rect = v.frame if dirty_rect is None else dirty_rect.union(v.frame)
+    if self._batch_depth:
+      self._batch_dirty_rect = dirty_rect
+      self._batch_needs_layout = True
+      self._batch_subviews_did_change = True
+      return
+    if dirty_rect is not None:
+      self.set_needs_display(dirty_rect)
+    self.set_needs_layout(True)
+    self._notify_subviews_did_change()
+
+  def _notify_subviews_did_change(self):
+    view = self
+    while view is not None:
+      if view._batch_depth:
+        view._batch_subviews_did_change = True
+        return
+      view.descendant_subviews_did_change()
+      view = view.superview
+
+  def descendant_subviews_did_change(self):
+    """
+    Called on a view and each of its ancestors after subviews are added to or
+    removed from it or any of its descendants.
+    """
+    pass
 
   def perform_draw(self, ctx=None):
+    """
+    Draw this view and its subviews. If ``ctx`` is clipped, subtrees whose
+    frames fall outside the clip rect are skipped.
+    """
     ctx = ctx or BearLibTerminalContext()
+    self._dirty_rect = None
     if self.is_hidden:
       return
+    if self._layer is not None and self._layer != ctx.current_layer:
+      with ctx.temporary_layer(self._layer):
+        self._draw_with_subviews(ctx)
+    else:
+      self._draw_with_subviews(ctx)
+
+  def _draw_with_subviews(self, ctx):
     self.draw(ctx)
+    # Equivalent to ``with ctx.translate(...)``, without the generator overhead
+    # in the hottest loop of every frame
+    old_offset = ctx.offset
+    clip_rect = ctx.clip_rect
     for view in self.subviews:
-      with ctx.translate(view.frame.origin):
-        view.perform_draw(ctx)
+      frame = view._frame
+      if clip_rect is not None and not clip_rect.intersects(frame.moved_by(old_offset)):
+        continue
+      ctx.offset = old_offset + frame[0]
+      view.perform_draw(ctx)
+    ctx.offset = old_offset
 
   def draw(self, ctx):
     pass
 
   def perform_layout(self):
+    """
+    Lay out every view in this tree that needs it. Subtrees where neither
+    ``needs_layout`` nor ``descendant_needs_layout`` is set are skipped, so
+    this is O(1) on an unchanged tree.
+    """
     if self.needs_layout:
       self.layout_subviews()
       self.needs_layout = False
-    for view in self.subviews:
-      view.perform_layout()
+      # every subview might have a new frame, so check them all
+      self.descendant_needs_layout = True
+    # laying out a subview can invalidate another one, so repeat until clean
+    while self.descendant_needs_layout:
+      self.descendant_needs_layout = False
+      for view in self.subviews:
+        if view.needs_layout or view.descendant_needs_layout:
+          view.perform_layout()
 
   def layout_subviews(self):
     """
     Set the frames of all subviews relative to ``self.bounds``. By default,
-    applies the springs-and-struts algorithm using each view's
-    ``layout_options`` and ``layout_spec`` properties.
+    asks ``self.layout_engine`` to do it, which unless you change it applies
+    the springs-and-struts algorithm using each view's ``layout_options`` and
+    ``layout_spec`` properties.
+    """
+    self.layout_engine.layout_subviews(self)
+
+  ### hit testing ###
+
+  def update_hit_index(self):
+    """
+    On a root view with a ``hit_index`` (a ``SpatialGrid``), store the
+    terminal-relative frames of views that were added or moved since the last
+    call. Call after ``perform_layout()``.
     """
+    if self.hit_index is None:
+      return
+    self._update_hit_index(self.hit_index, self.bounds, 0, False)
+
+  def _update_hit_index(self, grid, absolute_frame, depth, force):
+    # a moved view moves all of its descendants
+    force = force or self.needs_hit_index_update
+    if force:
+      grid.update(self, absolute_frame, depth)
+    self.needs_hit_index_update = False
+    if not (force or self.descendant_needs_hit_index_update):
+      return
+    self.descendant_needs_hit_index_update = False
+    origin = absolute_frame.origin
     for view in self.subviews:
-      _apply_springs_and_struts_layout_to_view(view)
+      if force or view.needs_hit_index_update or view.descendant_needs_hit_index_update:
+        view._update_hit_index(
+          grid, view._frame.moved_by(origin), depth + 1, force)
+
+  def hit_test(self, point):
+    """
+    On a root view with a ``hit_index``, return the deepest visible view
+    containing ``point`` (in terminal coordinates), or ``None``
+    """
+    if self.hit_index is None:
+      return None
+    return hit_test(self.hit_index, point)
 
   ### bounds, frame ###
 
+  @property
+  def layout_options(self):
+    return self._layout_options
+
+  @layout_options.setter
+  def layout_options(self, new_value):
+    self._layout_options = new_value
+    self._layout_function = None
+    if self.superview:
+      self.superview.set_needs_layout(True)
+
   @property
   def intrinsic_size(self):
     return Point(0, 0)
@@ -104,9 +431,16 @@ class View:
   def frame(self, new_value):
     if new_value == self._frame:
       return
+    old_frame = self._frame
     self._frame = new_value
     self._bounds = new_value.with_origin(Point(0, 0))
     self.set_needs_layout(True)
+    self.set_needs_hit_index_update()
+    if self.superview:
+      self.superview.set_needs_display(old_frame)
+      self.superview.set_needs_display(new_value)
+    else:
+      self.set_needs_display()
 
   @property
   def bounds(self):
@@ -118,9 +452,7 @@ class View:
         raise ValueError("Bounds is always anchored at (0, 0)")
     if new_value == self._bounds:
       return
-    self._bounds = new_value
-    self._frame = self._frame.with_size(new_value.size)
-    self.set_needs_layout(True)
+    self.frame = self._frame.with_size(new_value.size)
 
   ### responder chain, input ###
 
@@ -134,10 +466,12 @@ class View:
 
   def did_become_first_responder(self):
     self.set_needs_layout(True)
+    self.set_needs_display()
     self.is_first_responder = True
 
   def did_resign_first_responder(self):
     self.set_needs_layout(True)
+    self.set_needs_display()
     self.is_first_responder = False
 
   def descendant_did_become_first_responder(self, view):
@@ -156,6 +490,16 @@ class View:
     """
     pass
 
+  def get_responder_to_focus(self, view, is_forward):
+    """
+    Called by FirstResponderContainerView when stepping focus forward or
+    backward lands on ``view``, a descendant of this view. Returns the view
+    that should become the first responder instead. This is so list
+    implementations can start at their first or last row even if its view
+    doesn't exist yet.
+    """
+    return view
+
   def terminal_read(self, val):
     """
     Fires when an input event occurs, and either:
@@ -168,6 +512,17 @@ class View:
     """
     return False
 
+  def mouse_read(self, val, point):
+    """
+    Fires when a mouse event (``TK_MOUSE_*``) happens over this view, or over
+    a descendant that didn't handle it. ``point`` is relative to
+    ``self.bounds``.
+
+    Return a truthy value if you handled the event; otherwise it is passed to
+    the superview.
+    """
+    return False
+
   @property
   def first_responder_container_view(self):
     if hasattr(self, 'first_responder'):
@@ -222,76 +577,3 @@ def _option_field_to_id(val):
     else:
       value_start = 'derive'
 
-
-def _apply_springs_and_struts_layout_to_view(view):
-  options = view.layout_options
-  spec = view.layout_spec
-  superview_bounds = view.superview.bounds
-
-  fields = [
-    ('left', 'right', 'x', 'width'),
-    ('top', 'bottom', 'y', 'height'),
-  ]
-
-  final_frame = Rect(Point(-1000, -1000), Size(-1000, -1000))
-
-  for field_start, field_end, field_coord, field_size in fields:
-    debug_string = options.get_debug_string_for_keys(
-        [field_start, field_size, field_end])
-    matches = (
-      options.get_is_defined(field_start),
-      options.get_is_defined(field_size),
-      options.get_is_defined(field_end))
-    if matches == (True, True, True):
-      raise ValueError("Invalid spring/strut definition: {}".format(debug_string))
-    if matches == (False, False, False):
-      raise ValueError("Invalid spring/strut definition: {}".format(debug_string))
-    elif matches == (True, False, False):
-      setattr(
-        final_frame, field_coord,
-        options.get_value(field_start, view))
-      # pretend that size is constant from frame
-      setattr(
-        final_frame, field_size,
-        getattr(spec, field_size))
-    elif matches == (True, True, False):
-      setattr(
-        final_frame, field_coord,
-        options.get_value(field_start, view))
-      setattr(
-        final_frame, field_size,
-        options.get_value(field_size, view))
-    elif matches == (False, True, False):  # magical centering!
-      size_val = options.get_value(field_size, view)
-      setattr(final_frame, field_size, size_val)
-      setattr(
-        final_frame, field_coord,
-        getattr(superview_bounds, field_size) / 2 - size_val / 2)
-    elif matches == (False, True, True):
-      size_val = options.get_value(field_size, view)
-      setattr(
-        final_frame, field_coord,
-        getattr(superview_bounds, field_size) - options.get_value(field_end, view) - size_val)
-      setattr(final_frame, field_size, size_val)
-    elif matches == (False, False, True):
-      setattr(
-        final_frame, field_coord,
-        getattr(superview_bounds, field_size) - options.get_value(field_end, view))
-      # pretend that size is constant from frame
-      setattr(final_frame, field_size, getattr(spec, field_size))
-    elif matches == (True, False, True):
-      start_val = options.get_value(field_start, view) 
-      end_val = options.get_value(field_end, view) 
-      setattr(
-        final_frame, field_coord, start_val)
-      setattr(
-        final_frame, field_size,
-        getattr(superview_bounds, field_size) - start_val - end_val)
-    else:
-      raise ValueError("Unhandled case: {}".format(debug_string))
-
-  assert(final_frame.x != -1000)
-  assert(final_frame.y != -1000)
-  assert(final_frame.width != -1000)
-  assert(final_frame.height != -1000)
-  view.frame = final_frame.floored
@@ -8,6 +8,9 @@ setup(
         'appdirs',
         'bearlibterminal',
     ],
+    extras_require={
+        'numpy': ['numpy'],
+    },
     entry_points='''
         [console_scripts]
         babysit=clubsandwich.babysit:cli
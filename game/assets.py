@@ -1,65 +1,539 @@
 import json
+import os
+import re
+import struct
+import threading
 from pathlib import Path
+from time import monotonic
 
 from appdirs import user_data_dir
-from pyfiglet import Figlet
 
 
 PATH_ASSETS = Path(__file__).parent.parent / 'assets'
 PATH_GFX = PATH_ASSETS / 'gfx'
 PATH_FONTS = PATH_ASSETS / 'fonts'
+# Nothing here touches the disk until it's used; the directory is created
+# by the first write into it.
 PATH_USER_DATA = Path(user_data_dir('com.steveasleep.beepboop'))
-PATH_USER_DATA.mkdir(parents=True, exist_ok=True)
-print(PATH_USER_DATA)
 PATH_GAME_CONFIG = PATH_USER_DATA / 'settings.json'
+PATH_FIGLET_CACHE = PATH_USER_DATA / 'figlet_cache.json'
+PATH_FONT_INDEX = PATH_USER_DATA / 'font_index.json'
+DEFAULT_GAME_CONFIG = {
+    'cellsize': '16x24',
+    'fontsize': '12',
+}
 
-FONT_LOGO = Figlet(font=str(PATH_ASSETS / 'figlet_fonts' / 'CalvinS.flf'))
 
+def _write_json_atomically(path, value):
+    """
+    Write ``value`` to a temporary file next to ``path``, then rename it into
+    place, so readers never see a partly written file
+    """
+    # imported here because it's slow to import and only needed for writing
+    import tempfile
 
-def get_font_configs(size=16):
-    return ""
-    font_name_re_1 = re.compile(r'NotoSans(.*)-Regular.ttf')
-    font_name_re_2 = re.compile(r'Noto(.*)-Regular.ttf')
-    lines = []
-    for file_path in PATH_FONTS.iterdir():
-        m1 = font_name_re_1.match(file_path.name)
-        m2 = font_name_re_1.match(file_path.name)
-        if m1:
-            lines.append('{} font: {}, size={};'.format(
-                m1.groups(1)[0].lower(), str(file_path), size))
-    return '\n'.join(lines)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(
+        dir=str(path.parent), prefix=path.name + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(value, f)
+        os.replace(temp_path, str(path))
+    except BaseException:
+        os.unlink(temp_path)
+        raise
 
 
-def get_blt_config():
+class FigletFont:
+    """
+    Renders text with a figlet font, like ``pyfiglet.Figlet``, but the font
+    is only parsed (and pyfiglet only imported) if a rendering isn't cached.
+    Renderings are kept in an LRU cache in memory and in ``cache_path``,
+    keyed by a hash of the font file, the text, and the width, so usually
+    the font is never parsed at all.
+    """
+
+    MAX_MEMORY_CACHE_ENTRIES = 64
+    MAX_DISK_CACHE_ENTRIES = 256
+
+    def __init__(self, path, width=80, cache_path=PATH_FIGLET_CACHE):
+        super().__init__()
+        self.path = Path(path)
+        self.width = width
+        self.cache_path = cache_path
+        self._figlet = None
+        self._font_hash = None
+        self._disk_cache = None
+        # text -> rendering, least recently used first
+        self._memory_cache = {}
+
+    @property
+    def figlet(self):
+        if self._figlet is None:
+            from pyfiglet import Figlet
+            self._figlet = Figlet(font=str(self.path), width=self.width)
+        return self._figlet
+
+    @property
+    def font_hash(self):
+        if self._font_hash is None:
+            import hashlib
+            with self.path.open('rb') as f:
+                self._font_hash = hashlib.sha1(f.read()).hexdigest()
+        return self._font_hash
+
+    def _get_disk_cache(self):
+        if self._disk_cache is None:
+            try:
+                with self.cache_path.open() as f:
+                    self._disk_cache = json.load(f)
+            except (OSError, ValueError):
+                self._disk_cache = {}
+        return self._disk_cache
+
+    def renderText(self, text):
+        memory_cache = self._memory_cache
+        if text in memory_cache:
+            rendered = memory_cache[text] = memory_cache.pop(text)
+            return rendered
+        rendered = self._render_uncached(text)
+        memory_cache[text] = rendered
+        while len(memory_cache) > self.MAX_MEMORY_CACHE_ENTRIES:
+            del memory_cache[next(iter(memory_cache))]
+        return rendered
+
+    def _render_uncached(self, text):
+        key = '{}:{}:{}'.format(self.font_hash, self.width, text)
+        disk_cache = self._get_disk_cache()
+        if key in disk_cache:
+            return disk_cache[key]
+        rendered = self.figlet.renderText(text)
+        disk_cache[key] = rendered
+        while len(disk_cache) > self.MAX_DISK_CACHE_ENTRIES:
+            del disk_cache[next(iter(disk_cache))]
+        try:
+            _write_json_atomically(self.cache_path, disk_cache)
+        except OSError:
+            pass  # the cache is only an optimization
+        return rendered
+
+
+FONT_LOGO = FigletFont(PATH_ASSETS / 'figlet_fonts' / 'CalvinS.flf')
+
+
+def read_font_coverage(path):
+    """
+    Returns the codepoints a TrueType font has glyphs for, as a sorted list of
+    inclusive ``[first, last]`` ranges, by reading its ``cmap`` table
+    """
+    with Path(path).open('rb') as f:
+        data = f.read()
+    num_tables, = struct.unpack_from('>H', data, 4)
+    for i in range(num_tables):
+        tag, _, offset, _ = struct.unpack_from('>4sIII', data, 12 + i * 16)
+        if tag == b'cmap':
+            break
+    else:
+        return []
+
+    subtables = {}
+    num_subtables, = struct.unpack_from('>H', data, offset + 2)
+    for i in range(num_subtables):
+        platform_id, encoding_id, subtable_offset = struct.unpack_from(
+            '>HHI', data, offset + 4 + i * 8)
+        subtable_offset += offset
+        subtable_format, = struct.unpack_from('>H', data, subtable_offset)
+        subtables.setdefault(
+            (platform_id, encoding_id, subtable_format), subtable_offset)
+
+    for platform_id, encoding_id, subtable_format in _CMAP_PREFERENCES:
+        for key, subtable_offset in subtables.items():
+            if key[0] == platform_id and key[2] == subtable_format and (
+                    encoding_id is None or key[1] == encoding_id):
+                read = _CMAP_READERS[subtable_format]
+                return read(data, subtable_offset)
+    return []
+
+
+def _read_cmap_format_12(data, offset):
+    num_groups, = struct.unpack_from('>I', data, offset + 12)
+    ranges = []
+    for i in range(num_groups):
+        first, last, _ = struct.unpack_from('>III', data, offset + 16 + i * 12)
+        _add_range(ranges, first, last)
+    return ranges
+
+
+def _read_cmap_format_4(data, offset):
+    seg_count = struct.unpack_from('>H', data, offset + 6)[0] // 2
+    ends_offset = offset + 14
+    starts_offset = ends_offset + seg_count * 2 + 2
+    deltas_offset = starts_offset + seg_count * 2
+    range_offsets_offset = deltas_offset + seg_count * 2
+    ends = struct.unpack_from('>%dH' % seg_count, data, ends_offset)
+    starts = struct.unpack_from('>%dH' % seg_count, data, starts_offset)
+    deltas = struct.unpack_from('>%dH' % seg_count, data, deltas_offset)
+    range_offsets = struct.unpack_from(
+        '>%dH' % seg_count, data, range_offsets_offset)
+
+    ranges = []
+    for i in range(seg_count):
+        start, end = starts[i], min(ends[i], 0xFFFE)
+        for codepoint in range(start, end + 1):
+            # glyph 0 is "missing glyph"
+            if range_offsets[i] == 0:
+                glyph = (codepoint + deltas[i]) & 0xFFFF
+            else:
+                glyph_offset = (
+                    range_offsets_offset + i * 2 + range_offsets[i] +
+                    (codepoint - start) * 2)
+                glyph, = struct.unpack_from('>H', data, glyph_offset)
+                if glyph:
+                    glyph = (glyph + deltas[i]) & 0xFFFF
+            if glyph:
+                _add_range(ranges, codepoint, codepoint)
+    return ranges
+
+
+# (platform, encoding or None for any, format), best first. Only Unicode
+# subtables are used: Windows (3) with encoding 10 (full repertoire) or 1
+# (BMP), or the Unicode platform (0). Others, like Mac Roman (1, 0) or Windows
+# Symbol (3, 0), map other character sets.
+_CMAP_PREFERENCES = [
+    (3, 10, 12),
+    (0, None, 12),
+    (3, 1, 4),
+    (0, None, 4),
+]
+_CMAP_READERS = {
+    4: _read_cmap_format_4,
+    12: _read_cmap_format_12,
+}
+
+
+def _add_range(ranges, first, last):
+    if ranges and ranges[-1][1] + 1 >= first:
+        ranges[-1][1] = max(ranges[-1][1], last)
+    else:
+        ranges.append([first, last])
+
+
+class FontRegistry:
+    """
+    Knows which of the fonts in ``fonts_path`` has a glyph for each codepoint,
+    so that BearLibTerminal only loads the fonts some text actually needs.
+
+    ``NotoSans<Name>-Regular.ttf`` and ``Noto<Name>-Regular.ttf`` are
+    registered as named fonts called ``<name>`` (lowercase). Codepoints are
+    assigned to the base font if it has them, and otherwise to the first
+    named font, by file name, that does. Each font's coverage comes from its
+    ``cmap`` table and is cached in ``cache_path`` until the file changes.
+
+    Call ``load_fonts_for_text()`` before drawing text that might contain new
+    scripts, pass its result to ``terminal.set()``, and draw
+    ``markup(text)``, which switches to the right font for each run of
+    characters. The markup works with or without the context's compositor
+    mode.
+    """
+
+    FONT_NAME_RES = [
+        re.compile(r'NotoSans(.*)-Regular\.ttf$'),
+        re.compile(r'Noto(.*)-Regular\.ttf$'),
+    ]
+
+    def __init__(self, fonts_path, cache_path, base_font_name='mono'):
+        super().__init__()
+        self.fonts_path = Path(fonts_path)
+        self.cache_path = cache_path
+        self.base_font_name = base_font_name
+        self._font_paths = None
+        self._font_by_codepoint = None
+        # font name -> size it was last loaded at
+        self._loaded_sizes = {}
+
+    @property
+    def font_paths(self):
+        """Font name -> path, for every font including the base font"""
+        if self._font_paths is None:
+            font_paths = {}
+            for file_path in sorted(self.fonts_path.iterdir()):
+                for font_name_re in self.FONT_NAME_RES:
+                    m = font_name_re.match(file_path.name)
+                    if m:
+                        font_paths.setdefault(m.group(1).lower(), file_path)
+                        break
+            self._font_paths = font_paths
+        return self._font_paths
+
+    def _get_coverage(self):
+        try:
+            with self.cache_path.open() as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+        coverage = {}
+        did_change = False
+        for name, path in self.font_paths.items():
+            stat = path.stat()
+            key = '{}:{}:{}'.format(path.name, stat.st_size, stat.st_mtime_ns)
+            if key not in cache:
+                cache[key] = read_font_coverage(path)
+                did_change = True
+            coverage[name] = cache[key]
+        if did_change:
+            try:
+                _write_json_atomically(self.cache_path, cache)
+            except OSError:
+                pass  # the cache is only an optimization
+        return coverage
+
+    @property
+    def font_by_codepoint(self):
+        """Codepoint -> font name, for codepoints the base font doesn't have"""
+        if self._font_by_codepoint is None:
+            coverage = self._get_coverage()
+            base_ranges = coverage.pop(self.base_font_name, [])
+            font_by_codepoint = {}
+            for name in sorted(coverage):
+                for first, last in coverage[name]:
+                    for codepoint in range(first, last + 1):
+                        font_by_codepoint.setdefault(codepoint, name)
+            for first, last in base_ranges:
+                for codepoint in range(first, last + 1):
+                    font_by_codepoint.pop(codepoint, None)
+            self._font_by_codepoint = font_by_codepoint
+        return self._font_by_codepoint
+
+    def get_font_names(self, text):
+        """Names of the fonts needed to draw ``text``, besides the base font"""
+        if not text:
+            return set()
+        font_by_codepoint = self.font_by_codepoint
+        names = {font_by_codepoint.get(ord(c)) for c in set(text)}
+        names.discard(None)
+        return names
+
+    def get_font_configs(self, names, size):
+        return '\n'.join(
+            '{} font: {}, size={};'.format(name, self.font_paths[name], size)
+            for name in sorted(names))
+
+    def load_fonts_for_text(self, text, size):
+        """
+        Returns BearLibTerminal config for the fonts ``text`` needs that
+        haven't been loaded at ``size`` yet, and remembers them as loaded
+        """
+        names = {
+            name for name in self.get_font_names(text)
+            if self._loaded_sizes.get(name) != size}
+        for name in names:
+            self._loaded_sizes[name] = size
+        return self.get_font_configs(names, size)
+
+    def forget_loaded_fonts(self):
+        """Call after the terminal is reconfigured from scratch"""
+        self._loaded_sizes = {}
+
+    def markup(self, text):
+        """
+        Wrap runs of characters that need a named font in ``[font=name]``
+        tags. ``text`` must not contain markup already.
+        """
+        font_by_codepoint = self.font_by_codepoint
+        parts = []
+        current_name = None
+        for c in text:
+            name = font_by_codepoint.get(ord(c))
+            if name != current_name and not c.isspace():
+                if current_name is not None:
+                    parts.append('[/font]')
+                if name is not None:
+                    parts.append('[font={}]'.format(name))
+                current_name = name
+            parts.append(c)
+        if current_name is not None:
+            parts.append('[/font]')
+        return ''.join(parts)
+
+
+FONT_REGISTRY = FontRegistry(PATH_FONTS, PATH_FONT_INDEX)
+
+
+def get_font_configs(size=16, *, text=''):
+    """
+    BearLibTerminal config for the named fonts needed to draw ``text``. See
+    ``FontRegistry``.
+    """
+    return FONT_REGISTRY.get_font_configs(
+        FONT_REGISTRY.get_font_names(text), size)
+
+
+def get_blt_config(text=''):
+    """
+    The whole BearLibTerminal config, including named fonts for ``text``.
+    More fonts can be loaded later with ``FONT_REGISTRY.load_fonts_for_text()``.
+    """
+    FONT_REGISTRY.forget_loaded_fonts()
+    config = GAME_CONFIG.as_dict()
     return """
     window.title='Beep Boop RL';
     log.level=trace;
     window.resizeable=true;
+    input.filter=[keyboard, mouse];
     window.size=72x25
     window.cellsize={cellsize};
     font: assets/fonts/NotoMono-Regular.ttf, size={fontsize};
-    {fonts}""".format(fonts=get_font_configs(), **get_game_config())[1:]
+    {fonts}""".format(
+        fonts=FONT_REGISTRY.load_fonts_for_text(text, config['fontsize']),
+        **config)[1:]
+
+
+class GameConfigStore:
+    """
+    A JSON settings file, kept in memory. The file is read the first time a
+    value is needed, and again only when its modification time changes. The
+    modification time is checked at most once every ``check_interval``
+    seconds, so reading values almost never touches the disk.
+
+    ``update()`` changes the values in memory immediately, then writes the
+    whole file atomically. If ``background_writes`` is true, the file is written on a
+    worker thread; call ``flush()`` to wait for it. ``flush()`` re-raises the
+    error if a background write failed. Changes to the file on disk are
+    ignored while a write is pending.
+    """
+
+    def __init__(self, path, defaults, check_interval=1.0, background_writes=False):
+        super().__init__()
+        self.path = Path(path)
+        self.defaults = dict(defaults)
+        self.check_interval = check_interval
+        self.background_writes = background_writes
+        self._values = None
+        self._mtime = None
+        self._last_check_time = None
+        self._lock = threading.Lock()
+        self._pending_values = None
+        self._writer = None
+        self._write_error = None
+
+    def _get_mtime(self):
+        try:
+            return self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self):
+        mtime = self._get_mtime()
+        values = dict(self.defaults)
+        if mtime is not None:
+            with self.path.open() as f:
+                values.update(json.load(f))
+        self._values = values
+        self._mtime = mtime
+
+    def _get_values(self):
+        now = monotonic()
+        if self._values is None:
+            self._load()
+            self._last_check_time = now
+        elif now - self._last_check_time >= self.check_interval:
+            self._last_check_time = now
+            with self._lock:
+                is_writing = self._writer is not None
+                mtime = self._mtime
+            if not is_writing and self._get_mtime() != mtime:
+                self._load()
+        return self._values
+
+    def reload(self):
+        """Read the file again on the next access"""
+        self._values = None
+
+    def get(self, key, default=None):
+        return self._get_values().get(key, default)
+
+    def __getitem__(self, key):
+        return self._get_values()[key]
+
+    def get_str(self, key):
+        return str(self[key])
+
+    def get_int(self, key):
+        return int(self[key])
+
+    def get_float(self, key):
+        return float(self[key])
+
+    def get_dimensions(self, key):
+        """Returns a ``'WxH'`` value, like ``cellsize``, as a ``(w, h)`` tuple of ints"""
+        width, height = self.get_str(key).split('x')
+        return int(width), int(height)
+
+    def as_dict(self):
+        return dict(self._get_values())
+
+    def update(self, new_values):
+        values = dict(self._get_values())
+        values.update(new_values)
+        self._values = values
+        if not self.background_writes:
+            self._write(values)
+            return
+        with self._lock:
+            self._pending_values = values
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_pending)
+                self._writer.start()
+
+    def flush(self):
+        """
+        Wait until every ``update()`` has been written to disk. Raises the
+        error from the last failed background write, if any.
+        """
+        while True:
+            with self._lock:
+                writer = self._writer
+                if writer is None:
+                    error, self._write_error = self._write_error, None
+                    break
+            writer.join()
+        if error is not None:
+            raise error
+
+    def _write_pending(self):
+        while True:
+            with self._lock:
+                values = self._pending_values
+                self._pending_values = None
+                if values is None:
+                    self._writer = None
+                    return
+            try:
+                self._write(values)
+            except Exception as error:
+                # keep going, so values from a later update() still get written
+                with self._lock:
+                    self._write_error = error
+
+    def _write(self, values):
+        _write_json_atomically(self.path, values)
+        mtime = self._get_mtime()
+        with self._lock:
+            self._mtime = mtime
+
+
+GAME_CONFIG = GameConfigStore(
+    PATH_GAME_CONFIG, DEFAULT_GAME_CONFIG, background_writes=True)
+
 
 def get_game_config():
-    if PATH_GAME_CONFIG.exists():
-        with PATH_GAME_CONFIG.open() as f:
-            return json.load(f)
-    else:
-        return {
-            'cellsize': '16x24',
-            'fontsize': '12',
-        }
+    return GAME_CONFIG.as_dict()
 
 
 def update_game_config(new_values):
-    config = get_game_config()
-    with PATH_GAME_CONFIG.open('w') as f:
-        config.update(new_values)
-        return json.dump(config, f)
+    GAME_CONFIG.update(new_values)
 
 
 def get_image(name):
     with (PATH_ASSETS / 'text_images' / (name + '.txt')).open() as f:
         return f.read().rstrip()
-
-print('JSON config:', get_game_config())
\ No newline at end of file
@@ -1,49 +1,26 @@
 #!/usr/bin/env python
 from math import floor
 
-from bearlibterminal import terminal
-from clubsandwich.blt.state import blt_state
-from clubsandwich.director import DirectorLoop, Scene
+from clubsandwich.blt.nice_terminal import terminal
+from clubsandwich.director import DirectorLoop
 from clubsandwich.geom import Rect, Point, Size
 from clubsandwich.ui import (
     LabelView,
     ButtonView,
-    FirstResponderContainerView,
     WindowView,
     ListView,
     LayoutOptions,
+    UIScene,
 )
 from game.assets import (
     get_blt_config,
     FONT_LOGO,
-    get_game_config,
+    GAME_CONFIG,
     update_game_config,
     get_image,
 )
 
 
-class UIScene(Scene):
-    def __init__(self, views, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-
-        if not isinstance(views, list):
-            views = [views]
-
-        self.view = FirstResponderContainerView(subviews=views, scene=self)
-        self.add_terminal_reader(self.view)
-
-    def terminal_read(self, val):
-        super().terminal_read(val)
-        if val == terminal.TK_BACKSLASH:
-            self.view.debug_print()
-
-    def terminal_update(self, is_active=False):
-        self.view.frame = self.view.frame.with_size(
-            Size(blt_state.width, blt_state.height))
-        self.view.perform_layout()
-        self.view.perform_draw()
-
-
 class MainMenuScene(UIScene):
     def __init__(self, *args, **kwargs):
         views = [
@@ -94,8 +71,8 @@ class SettingsScene(UIScene):
     FONT_SIZES = ['12', '18', '24']
 
     def __init__(self, *args, **kwargs):
-        self.tile_size = get_game_config()['cellsize']
-        self.font_size = get_game_config()['fontsize']
+        self.tile_size = GAME_CONFIG.get_str('cellsize')
+        self.font_size = GAME_CONFIG.get_str('fontsize')
 
         self.button_tile_size = ButtonView(
             text=self.tile_size,
@@ -156,4 +133,4 @@ class TestLoop(DirectorLoop):
 
 
 if __name__ == '__main__':
-    TestLoop().run()
\ No newline at end of file
+    TestLoop(compositor=True, snapshot_state=True).run()
\ No newline at end of file
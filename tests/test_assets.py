@@ -0,0 +1,162 @@
+import json
+import struct
+import threading
+
+import pytest
+
+import game.assets
+from clubsandwich.blt.cell_buffer import CellBuffer
+from clubsandwich.blt.context import BearLibTerminalContext
+from clubsandwich.blt.headless import HeadlessTerminal
+from clubsandwich.blt.nice_terminal import set_backend
+from clubsandwich.geom import Point, Size
+from game.assets import (
+    PATH_FONTS,
+    FigletFont,
+    FontRegistry,
+    GameConfigStore,
+    get_font_configs,
+    read_font_coverage,
+)
+
+
+def test_background_write_reaches_disk(tmp_path):
+    path = tmp_path / 'config.json'
+    store = GameConfigStore(path, {'a': 1}, background_writes=True)
+    store.update({'b': 2})
+    store.flush()
+    assert json.loads(path.read_text()) == {'a': 1, 'b': 2}
+    assert store.as_dict() == {'a': 1, 'b': 2}
+
+
+def test_failed_background_write_is_raised_by_flush(tmp_path):
+    path = tmp_path / 'config.json'
+    store = GameConfigStore(path, {}, background_writes=True)
+    # sets can't be written as JSON
+    store.update({'bad': {1}})
+    with pytest.raises(TypeError):
+        store.flush()
+    # the error is only raised once, and later writes still work
+    store.flush()
+    store.update({'bad': 1})
+    store.flush()
+    assert json.loads(path.read_text()) == {'bad': 1}
+
+
+def test_updates_after_a_failed_background_write_are_written(tmp_path):
+    path = tmp_path / 'config.json'
+    store = GameConfigStore(path, {}, background_writes=True)
+    write = store._write
+    started = threading.Event()
+    proceed = threading.Event()
+
+    def fail_once(values):
+        if not started.is_set():
+            started.set()
+            proceed.wait(1)
+            raise OSError('disk full')
+        write(values)
+
+    store._write = fail_once
+    store.update({'a': 1})
+    started.wait(1)
+    # queued while the failing write is in progress
+    store.update({'b': 2})
+    proceed.set()
+    with pytest.raises(OSError):
+        store.flush()
+    assert json.loads(path.read_text()) == {'a': 1, 'b': 2}
+
+
+def test_figlet_renderings_are_cached_per_font(tmp_path, monkeypatch):
+    font_path = tmp_path / 'font.flf'
+    font_path.write_text('not really a font')
+    fonts = [
+        FigletFont(font_path, cache_path=tmp_path / 'cache.json')
+        for _ in range(2)]
+    calls = []
+    for font in fonts:
+        monkeypatch.setattr(
+            font, '_render_uncached',
+            lambda text, font=font: calls.append((font, text)) or text.upper())
+
+    assert fonts[0].renderText('hi') == 'HI'
+    assert fonts[0].renderText('hi') == 'HI'
+    assert fonts[1].renderText('hi') == 'HI'
+    assert calls == [(fonts[0], 'hi'), (fonts[1], 'hi')]
+
+    for i in range(FigletFont.MAX_MEMORY_CACHE_ENTRIES + 1):
+        fonts[0].renderText(str(i))
+    assert len(fonts[0]._memory_cache) == FigletFont.MAX_MEMORY_CACHE_ENTRIES
+    assert 'hi' not in fonts[0]._memory_cache
+
+
+def cmap_format_4(codepoint):
+    # one segment mapping codepoint to glyph 1, plus the required final one
+    return struct.pack(
+        '>7H2HH2H2h2H', 4, 32, 0, 4, 4, 1, 0,
+        codepoint, 0xFFFF, 0, codepoint, 0xFFFF, 1 - codepoint, 1, 0, 0)
+
+
+def cmap_format_12(first, last):
+    return struct.pack('>HHIII3I', 12, 0, 28, 0, 1, first, last, 1)
+
+
+def write_font(path, subtables):
+    """A font file with just a cmap table of ``(platform, encoding, data)``"""
+    cmap = struct.pack('>HH', 0, len(subtables))
+    offset = 4 + 8 * len(subtables)
+    for platform_id, encoding_id, data in subtables:
+        cmap += struct.pack('>HHI', platform_id, encoding_id, offset)
+        offset += len(data)
+    cmap += b''.join(data for _, _, data in subtables)
+    header = struct.pack('>IHHHH', 0x10000, 1, 16, 0, 0)
+    header += struct.pack('>4sIII', b'cmap', 0, 28, len(cmap))
+    path.write_bytes(header + cmap)
+
+
+def test_font_coverage_uses_unicode_subtables(tmp_path):
+    path = tmp_path / 'font.ttf'
+    write_font(path, [
+        (1, 0, cmap_format_4(ord('A'))),  # Mac Roman
+        (3, 0, cmap_format_12(0xF000, 0xF0FF)),  # Windows Symbol
+        (3, 1, cmap_format_4(ord('B'))),
+    ])
+    assert read_font_coverage(path) == [[ord('B'), ord('B')]]
+
+    write_font(path, [
+        (3, 1, cmap_format_4(ord('B'))),
+        (3, 10, cmap_format_12(0x1F600, 0x1F64F)),
+    ])
+    assert read_font_coverage(path) == [[0x1F600, 0x1F64F]]
+
+
+def test_get_font_configs_takes_size_first(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        game.assets, 'FONT_REGISTRY',
+        FontRegistry(PATH_FONTS, tmp_path / 'font_index.json'))
+    assert get_font_configs(24) == ''
+    config = get_font_configs(24, text='\u0532')
+    assert config.startswith('armenian font: ')
+    assert config.endswith('size=24;')
+
+
+class RecordingTerminal(HeadlessTerminal):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.printed = []
+
+    def print(self, x, y, s):
+        self.printed.append(s)
+        return super().print(x, y, s)
+
+
+def test_markup_draws_named_fonts_in_compositor_mode(tmp_path):
+    registry = FontRegistry(PATH_FONTS, tmp_path / 'font_index.json')
+    backend = RecordingTerminal(size=Size(10, 1))
+    set_backend(backend)
+    ctx = BearLibTerminalContext(buffer=CellBuffer(Size(10, 1)))
+    ctx.print(Point(0, 0), registry.markup('Hi \u0532\u0533'))
+    ctx.flush()
+    assert backend.get_text().rstrip() == 'Hi \u0532\u0533'
+    assert '[font=armenian]\u0532\u0533[/font]' in backend.printed
@@ -0,0 +1,74 @@
+from clubsandwich.blt.cell_buffer import (
+    DEFAULT_BG,
+    DEFAULT_FG,
+    CellBuffer,
+    get_font_id,
+    parse_markup,
+)
+from clubsandwich.blt.context import BearLibTerminalContext
+from clubsandwich.blt.headless import HeadlessTerminal
+from clubsandwich.blt.nice_terminal import set_backend
+from clubsandwich.geom import Point, Rect, Size
+
+RED = 0xFFFF0000
+
+
+def text_of(cells):
+    return ''.join(chr(cell[0]) for cell in cells)
+
+
+def test_parse_markup():
+    lines = parse_markup('a[color=#ff0000]b[[[/color]c]]\n[font=x]d[unknown]e')
+    assert [text_of(line) for line in lines] == ['ab[c]', 'de']
+    assert [cell[1] for cell in lines[0]] == [
+        DEFAULT_FG, RED, RED, DEFAULT_FG, DEFAULT_FG]
+    font_id = get_font_id('x')
+    assert font_id != 0
+    assert [cell[3] for cell in lines[1]] == [font_id, font_id]
+
+
+def test_tags_nest_and_extra_closing_tags_are_ignored():
+    lines = parse_markup('[bkcolor=#ff0000][b=#00ff00]a[/b]b[/bkcolor][/b]c')
+    assert [cell[2] for cell in lines[0]] == [0xFF00FF00, RED, DEFAULT_BG]
+
+
+def make_context(size=Size(20, 3)):
+    backend = HeadlessTerminal(size=size)
+    set_backend(backend)
+    return backend, BearLibTerminalContext(buffer=CellBuffer(size))
+
+
+def test_compositor_print_interprets_markup():
+    backend, ctx = make_context()
+    ctx.print(Point(0, 0), 'a[[b]] [color=red]c[/color]')
+    ctx.flush()
+    assert backend.get_text().splitlines()[0] == 'a[b] c'
+    assert backend.get_cell(5, 0)[1] == RED
+    assert backend.get_cell(0, 0)[1] == DEFAULT_FG
+
+
+def test_compositor_markup_is_clipped():
+    backend, ctx = make_context()
+    with ctx.clip(Rect(Point(2, 0), Size(3, 1))):
+        ctx.print(Point(0, 0), '[color=red]abcdef[/color]\nghi')
+    ctx.flush()
+    assert backend.get_text().split('\n')[:2] == ['  cde', '']
+
+
+class RecordingTerminal(HeadlessTerminal):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.printed = []
+
+    def print(self, x, y, s):
+        self.printed.append(s)
+        return super().print(x, y, s)
+
+
+def test_flush_sends_font_runs_as_markup():
+    buffer = CellBuffer(Size(10, 1))
+    buffer.print_markup(0, 0, 'a[font=armenian]bc[/font][[')
+    backend = RecordingTerminal(size=Size(10, 1))
+    buffer.flush(backend)
+    assert backend.printed == ['a', '[font=armenian]bc[/font]', '[[' + ' ' * 6]
+    assert backend.get_text() == 'abc['
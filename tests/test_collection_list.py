@@ -0,0 +1,66 @@
+from clubsandwich.blt.headless import HeadlessTerminal
+from clubsandwich.blt.nice_terminal import set_backend
+from clubsandwich.geom import Point, Rect, Size
+from clubsandwich.ui import (
+    ButtonView,
+    FirstResponderContainerView,
+    LabelView,
+    ListView,
+    ListViewDataSource,
+)
+
+
+class ButtonRows(ListViewDataSource):
+    def __init__(self, num_rows):
+        super().__init__()
+        self.num_rows = num_rows
+
+    def get_num_rows(self):
+        return self.num_rows
+
+    def create_row(self, index):
+        return (LabelView(''), ButtonView('', lambda: None))
+
+    def bind_row(self, row, index):
+        row[0].text = 'Row {}'.format(index)
+        row[1].text = str(index)
+
+
+def make_list(num_rows=50):
+    backend = HeadlessTerminal()
+    set_backend(backend)
+    list_view = ListView(data_source=ButtonRows(num_rows))
+    container = FirstResponderContainerView(subviews=[list_view])
+    container.frame = Rect(Point(0, 0), Size(40, 15))
+    container.perform_layout()
+    return backend, container, list_view
+
+
+def press_tab(backend, container, shift=False):
+    if shift:
+        backend.keys_down.add(backend.TK_SHIFT)
+    container.terminal_read(backend.TK_TAB)
+    backend.keys_down.discard(backend.TK_SHIFT)
+    container.perform_layout()
+
+
+def test_tab_wraps_around_to_the_first_row():
+    backend, container, list_view = make_list()
+    list_view.focus_row(49)
+    container.perform_layout()
+    assert list_view.min_row > 0
+
+    press_tab(backend, container)
+    assert list_view.focused_row == 0
+    assert list_view.min_row == 0
+    assert container.first_responder.text == '0'
+
+
+def test_shift_tab_wraps_around_to_the_last_row():
+    backend, container, list_view = make_list()
+    assert list_view.focused_row == 0
+
+    press_tab(backend, container, shift=True)
+    assert list_view.focused_row == 49
+    assert 49 in list_view.visible_row_range
+    assert container.first_responder.text == '49'
@@ -0,0 +1,69 @@
+import pytest
+
+from clubsandwich.blt.cell_buffer import DEFAULT_BG
+from clubsandwich.blt.headless import HeadlessTerminal
+from clubsandwich.blt.nice_terminal import set_backend
+from clubsandwich.director import DirectorLoop
+from clubsandwich.ui import ButtonView, LabelView, LayoutOptions, UIScene
+
+
+class MenuScene(UIScene):
+    def __init__(self):
+        super().__init__([
+            ButtonView(
+                text='Open', callback=self.open_overlay,
+                layout_options=LayoutOptions.row_bottom(3)),
+        ])
+
+    def open_overlay(self):
+        self.director().push_scene(OverlayScene())
+
+
+class OverlayScene(UIScene):
+    def __init__(self):
+        super().__init__([
+            LabelView(
+                'Overlay', layout_options=LayoutOptions.centered(20, 3)),
+        ])
+        self.covers_screen = False
+
+
+class MenuLoop(DirectorLoop):
+    def get_initial_scene(self):
+        return MenuScene()
+
+
+def run_menu(compositor):
+    backend = HeadlessTerminal()
+    set_backend(backend)
+    loop = MenuLoop(compositor=compositor)
+    loop.terminal_init()
+    # each event gets its own frame so colors carry over between frames
+    loop.run_loop_iteration()
+    backend.push_input(backend.TK_TAB)
+    loop.run_loop_iteration()
+    backend.push_input(backend.TK_ENTER)
+    loop.run_loop_iteration()
+    return backend
+
+
+@pytest.mark.parametrize('compositor', [False, True])
+def test_focused_button_color_does_not_leak(compositor):
+    backend = run_menu(compositor)
+    # only the focused button itself has a light background
+    light_cells = [
+        (x, y)
+        for x in range(backend.size.width)
+        for y in range(backend.size.height)
+        if (backend.get_cell(x, y) or (0, 0, DEFAULT_BG))[2] != DEFAULT_BG]
+    assert light_cells
+    assert all(y >= backend.size.height - 3 for x, y in light_cells)
+
+
+def test_direct_mode_matches_compositor():
+    direct = run_menu(compositor=False)
+    composited = run_menu(compositor=True)
+    width, height = direct.size
+    for y in range(height):
+        for x in range(width):
+            assert direct.get_cell(x, y) == composited.get_cell(x, y), (x, y)
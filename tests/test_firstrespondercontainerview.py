@@ -0,0 +1,39 @@
+from clubsandwich.blt.headless import HeadlessTerminal
+from clubsandwich.blt.nice_terminal import set_backend
+from clubsandwich.ui import ButtonView, FirstResponderContainerView, View
+
+
+def make_button(text):
+    return ButtonView(text, lambda: None)
+
+
+def focus_order(container, num_steps):
+    texts = []
+    for _ in range(num_steps):
+        texts.append(container.first_responder.text)
+        container.find_next_responder()
+    return texts
+
+
+def test_focus_order_follows_added_and_removed_views():
+    set_backend(HeadlessTerminal())
+    rows = [View(subviews=[make_button(text)]) for text in 'abc']
+    container = FirstResponderContainerView(subviews=rows)
+    assert focus_order(container, 4) == ['a', 'b', 'c', 'a']
+
+    rows[1].add_subviews([make_button('b2')])
+    assert focus_order(container, 5) == ['b', 'b2', 'c', 'a', 'b']
+
+    container.remove_subviews([rows[0]])
+    assert focus_order(container, 4) == ['b2', 'c', 'b', 'b2']
+
+
+def test_removing_the_first_responder_moves_focus():
+    set_backend(HeadlessTerminal())
+    rows = [View(subviews=[make_button(text)]) for text in 'abc']
+    container = FirstResponderContainerView(subviews=rows)
+    container.find_next_responder()
+    assert container.first_responder.text == 'b'
+    container.remove_subviews([rows[1]])
+    assert container.first_responder.text == 'a'
+    assert focus_order(container, 3) == ['a', 'c', 'a']
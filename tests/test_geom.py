@@ -0,0 +1,40 @@
+import pytest
+
+from clubsandwich.geom import Point, Rect, Size
+
+
+def test_points_are_not_equal_to_tuples():
+    assert Point(1, 2) != (1, 2)
+    assert not Point(1, 2) == (1, 2)
+    assert Point(1, 2) == Point(1, 2)
+    assert Point(1, 2) == Size(1, 2)
+
+
+def test_rects_are_not_equal_to_tuples():
+    rect = Rect(Point(1, 2), Size(3, 4))
+    assert rect == Rect(Point(1, 2), Size(3, 4))
+    assert rect != ((1, 2), (3, 4))
+
+
+def test_values_hash_like_before():
+    rect = Rect(Point(1, 2), Size(3, 4))
+    assert {Point(1, 2): 'a'}[Point(1, 2)] == 'a'
+    assert {rect: 'a'}[Rect(Point(1, 2), Size(3, 4))] == 'a'
+
+
+def test_in_tests_containment():
+    rect = Rect(Point(1, 1), Size(2, 2))
+    assert Point(1, 1) in rect
+    assert Point(2, 2) in rect
+    assert Point(3, 1) not in rect
+    assert rect.origin not in Rect(Point(0, 0), Size(0, 0))
+
+
+def test_empty_arrays_are_integers():
+    pytest.importorskip('numpy')
+    from clubsandwich.geom import PointArray, RectArray
+    assert PointArray.from_points([]).xy.dtype.kind == 'i'
+    assert PointArray.from_points([]).xy.shape == (0, 2)
+    assert RectArray.from_rects([]).xywh.dtype.kind == 'i'
+    assert RectArray.from_rects([]).xywh.shape == (0, 4)
+    assert PointArray.from_points([Point(1.5, 2)]).xy.dtype.kind == 'f'
@@ -0,0 +1,29 @@
+import pytest
+
+from clubsandwich.geom import Point, Rect, Size
+from clubsandwich.ui import GridLayout, View, distribute
+
+
+def test_distribute_uses_all_space():
+    assert distribute(10, [(0, None, 0, 1)] * 3) == [(0, 3), (3, 3), (6, 4)]
+    assert distribute(10, [(1, 2, 1, 1), (0, None, 0, 1)], spacing=1) == [
+        (1, 2), (5, 5)]
+
+
+@pytest.mark.parametrize('columns', [0, -1])
+def test_grid_needs_a_column(columns):
+    with pytest.raises(ValueError):
+        GridLayout(columns)
+
+
+def test_grid_places_subviews_in_rows():
+    view = View(
+        frame=Rect(Point(0, 0), Size(10, 4)),
+        subviews=[View() for _ in range(3)])
+    view.layout_engine = GridLayout(2)
+    view.perform_layout()
+    assert [subview.frame for subview in view.subviews] == [
+        Rect(Point(0, 0), Size(5, 2)),
+        Rect(Point(5, 0), Size(5, 2)),
+        Rect(Point(0, 2), Size(5, 2)),
+    ]
@@ -0,0 +1,28 @@
+from clubsandwich.geom import Point, Rect, Size
+from clubsandwich.ui import LayoutOptions, View
+
+
+def make_views(layout_options):
+    child = View(
+        frame=Rect(Point(10, 2), Size(5, 3)), layout_options=layout_options)
+    parent = View(frame=Rect(Point(0, 0), Size(20, 10)), subviews=[child])
+    return parent, child
+
+
+def test_frame_right_and_bottom_keep_the_frame():
+    parent, child = make_views(LayoutOptions(
+        width='frame', height='frame', top=None, right='frame', bottom='frame',
+        left=None))
+    parent.perform_layout()
+    assert child.frame == Rect(Point(10, 2), Size(5, 3))
+
+
+def test_get_value():
+    options = LayoutOptions(
+        width='frame', height=0.5, top=None, right='frame', bottom=2,
+        left=None)
+    parent, child = make_views(options)
+    assert options.get_value('right', child) == 5
+    assert options.get_value('width', child) == 5
+    assert options.get_value('height', child) == 5
+    assert options.get_value('bottom', child) == 2
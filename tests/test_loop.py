@@ -0,0 +1,66 @@
+import asyncio
+import threading
+
+from clubsandwich.blt.headless import HeadlessTerminal
+from clubsandwich.blt.loop import BearLibTerminalEventLoop
+from clubsandwich.blt.nice_terminal import set_backend
+
+
+class IdleLoop(BearLibTerminalEventLoop):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.events = []
+
+    def terminal_read(self, char):
+        self.events.append(char)
+
+    def is_idle(self):
+        return True
+
+
+class WaitingTerminal(HeadlessTerminal):
+    """Like a real terminal, peeking at an empty queue returns 0"""
+
+    def peek(self):
+        return self.input_queue[0][0] if self.input_queue else 0
+
+
+def test_idle_wait_returns_when_input_arrives():
+    backend = WaitingTerminal()
+    set_backend(backend)
+    loop = IdleLoop(fps=100)
+
+    async def wait():
+        asyncio.get_event_loop().call_later(
+            0.03, backend.push_input, backend.TK_A)
+        await loop._wait_for_input()
+
+    num_threads = threading.active_count()
+    asyncio.run(asyncio.wait_for(wait(), 1))
+    assert backend.peek() == backend.TK_A
+    assert threading.active_count() == num_threads
+
+
+def test_run_ends_when_the_script_runs_out():
+    backend = HeadlessTerminal()
+    set_backend(backend)
+    backend.push_input(backend.TK_A, backend.TK_B)
+    loop = IdleLoop()
+    loop.run()
+    assert loop.events == [backend.TK_A, backend.TK_B]
+    assert loop.frame_stats.num_idle_waits == 1
+
+
+def test_scroll_and_mouse_buttons_are_not_dropped_as_repeats():
+    backend = HeadlessTerminal()
+    set_backend(backend)
+    for _ in range(6):
+        backend.push_mouse(backend.TK_MOUSE_SCROLL, 1, 1, wheel=1)
+    backend.push_mouse(backend.TK_MOUSE_LEFT, 1, 1)
+    backend.push_mouse(backend.TK_MOUSE_LEFT, 1, 1)
+    backend.push_input(*[backend.TK_A] * 6)
+    loop = IdleLoop()
+    loop.run_loop_iteration()
+    assert loop.events == (
+        [backend.TK_MOUSE_SCROLL] * 6 + [backend.TK_MOUSE_LEFT] * 2 +
+        [backend.TK_A] * 3)
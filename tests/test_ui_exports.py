@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+from importlib import import_module
+
+import clubsandwich.ui as ui
+
+# names clubsandwich.ui star-imported from its own submodules before it
+# became lazy. Names it re-exported from elsewhere, like Rect or weakref,
+# were dropped on purpose.
+OLD_UI_NAMES = [
+    'ButtonView', 'FirstResponderContainerView', 'LabelView', 'LayoutOptions',
+    'ListView', 'RectView', 'View', 'WindowView', 'ZERO_RECT',
+    'temporary_color',
+]
+
+
+def test_exports_match_submodules():
+    for module_name, names in ui._EXPORTS.items():
+        module = import_module(module_name, ui.__name__)
+        assert names == module.__all__, module_name
+
+
+def test_old_names_are_still_exported():
+    assert set(OLD_UI_NAMES) <= set(ui.__all__)
+    for name in ui.__all__:
+        assert getattr(ui, name) is not None
+
+
+def test_import_does_not_load_submodules():
+    code = (
+        'import sys, clubsandwich.ui\n'
+        'print(sorted(m for m in sys.modules'
+        ' if m.startswith("clubsandwich.ui.") or m == "asyncio"))')
+    result = subprocess.run(
+        [sys.executable, '-c', code], check=True, stdout=subprocess.PIPE,
+        universal_newlines=True,
+        env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)))
+    assert result.stdout.strip() == '[]'
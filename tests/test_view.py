@@ -0,0 +1,47 @@
+from clubsandwich.blt.cell_buffer import DEFAULT_BG, DEFAULT_FG
+from clubsandwich.blt.context import BearLibTerminalContext
+from clubsandwich.blt.headless import HeadlessTerminal
+from clubsandwich.blt.nice_terminal import set_backend, terminal
+from clubsandwich.blt.state import blt_state
+from clubsandwich.geom import Point, Rect, Size
+from clubsandwich.ui import View, temporary_color
+
+
+def test_remove_subviews_ignores_views_that_are_not_subviews():
+    child = View()
+    other_parent = View(subviews=[View()])
+    stranger = other_parent.subviews[0]
+    parent = View(frame=Rect(Point(0, 0), Size(10, 10)), subviews=[child])
+
+    parent.remove_subviews([stranger, child, child])
+
+    assert list(parent.subviews) == []
+    assert child.superview is None
+    assert stranger.superview is other_parent
+    assert list(other_parent.subviews) == [stranger]
+
+
+def test_remove_subviews_accepts_own_subview_list():
+    parent = View(subviews=[View(), View()])
+    parent.remove_subviews(parent.subviews)
+    assert list(parent.subviews) == []
+
+
+def test_temporary_color_without_context_restores_terminal_colors():
+    backend = HeadlessTerminal()
+    set_backend(backend)
+    backend.open()
+    terminal.color(0xFF00FF00)
+    with temporary_color('#ff0000', None):
+        assert blt_state.color == 0xFFFF0000
+    assert blt_state.color == 0xFF00FF00
+
+
+def test_temporary_color_uses_context_color_stack():
+    set_backend(HeadlessTerminal())
+    ctx = BearLibTerminalContext()
+    with temporary_color('#ff0000', '#0000ff', ctx=ctx):
+        assert ctx.current_color == 0xFFFF0000
+        assert ctx.current_bkcolor == 0xFF0000FF
+    assert ctx.current_color == DEFAULT_FG
+    assert ctx.current_bkcolor == DEFAULT_BG